@@ -1,87 +1,178 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, JSONResponse
 import os
-import zipfile
-import shutil
 
-from app.audit.audit_engine import (
-    process_folder_pair,
-    extract_tracking_number,
-)
-
-from app.audit.audit_excel_writer import write_excel_summary
+from app.audit.audit_analytics import error_summary, parse_period
+from app.audit.audit_exports import EXPORT_FORMATS, MEDIA_TYPES, parse_export_formats
+from app.audit.audit_input import FeedbackArchive
+from app.audit.audit_jobs import discard_job, output_dir, submit_job, upload_path
+from app.audit.audit_pipeline import run_audit
+from app.audit.audit_state import create_job, get_state, is_valid_job_id
+from app.audit.audit_store import DEFAULT_STORE, is_valid_store_name
+from app.services.uploads import save_upload, spool_upload
 
 router = APIRouter()
 
 
 @router.post("/run-audit")
-async def run_audit_zip(feedback_zip: UploadFile = File(...)):
-    temp_root = "temp_feedback"
-    if os.path.exists(temp_root):
-        shutil.rmtree(temp_root)
-    os.makedirs(temp_root, exist_ok=True)
-
-    zip_path = os.path.join(temp_root, feedback_zip.filename)
-
-    # Save uploaded ZIP
-    with open(zip_path, "wb") as f:
-        f.write(await feedback_zip.read())
-
-    # Extract ZIP
-    with zipfile.ZipFile(zip_path, "r") as z:
-        z.extractall(temp_root)
-
-    # Locate folder containing 0xxxx / 1xxxx pairs
-    feedback_root = None
-    for root, dirs, files in os.walk(temp_root):
-        if any(d.startswith("0") or d.startswith("1") for d in dirs):
-            feedback_root = root
-            break
-
-    if not feedback_root:
-        return JSONResponse({"error": "No 0/1 folders found in ZIP"}, status_code=400)
+async def run_audit_zip(
+    feedback_zip: UploadFile = File(...),
+    incremental: bool = Form(False),
+    store: str = Form(DEFAULT_STORE),
+    report_format: str = Form("xlsx"),
+    period: str = Form(""),
+):
+    report_format = report_format.strip().lower()
+    if report_format != "xlsx" and report_format not in EXPORT_FORMATS:
+        return JSONResponse({"error": f"Unknown report format: {report_format}"}, status_code=400)
+
+    try:
+        period = parse_period(period)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if incremental and not is_valid_store_name(store):
+        return JSONResponse({"error": f"Invalid audit store name: {store}"}, status_code=400)
+
+    # Spool the upload in chunks; the ZIP is indexed, never extracted
+    spool = await spool_upload(feedback_zip)
+    archive = FeedbackArchive(spool)
+    try:
+        if archive.feedback_root is None:
+            return JSONResponse({"error": "No 0/1 folders found in ZIP"}, status_code=400)
+
+        # Fan folder pairs out across worker processes, off the event loop,
+        # streaming rows straight into the report files. Incremental runs
+        # only process new or changed tracking numbers.
+        formats = [] if report_format == "xlsx" else [report_format]
+        excel_path, export_paths = await run_in_threadpool(
+            run_audit, archive.iter_folder_pairs(), incremental, store, formats,
+            period=period or archive.period(),
+        )
+    finally:
+        archive.close()
+        spool.close()
 
-    folders = [
-        f for f in os.listdir(feedback_root)
-        if os.path.isdir(os.path.join(feedback_root, f))
-    ]
+    # Columnar / NDJSON copy of the same rows, one column per field
+    report_path = export_paths[0] if export_paths else excel_path
 
-    mt_folders = [f for f in folders if f.startswith("1")]
-    ed_folders = [f for f in folders if f.startswith("0")]
+    return FileResponse(
+        report_path,
+        media_type=MEDIA_TYPES[report_format],
+        filename=os.path.basename(report_path)
+    )
+
+
+# ------------------------------------------------------------
+# AUDIT JOBS (submit → progress events → download)
+# ------------------------------------------------------------
+def _has_feedback_folders(path):
+    with open(path, "rb") as f:
+        archive = FeedbackArchive(f)
+        try:
+            return archive.feedback_root is not None
+        finally:
+            archive.close()
+
+
+@router.post("/jobs", status_code=202)
+async def submit_audit_job(
+    request: Request,
+    feedback_zip: UploadFile = File(...),
+    incremental: bool = Form(False),
+    store: str = Form(DEFAULT_STORE),
+    formats: str = Form(""),
+    period: str = Form(""),
+):
+    """
+    Queues an audit and returns its job id right away. Progress is sent to
+    /subscribe?job_id=<id>; the report is downloaded from /jobs/<id>/report.
+    """
+    try:
+        export_formats = parse_export_formats(formats)
+        period = parse_period(period)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if incremental and not is_valid_store_name(store):
+        return JSONResponse({"error": f"Invalid audit store name: {store}"}, status_code=400)
+
+    job_id = create_job()
+    try:
+        await save_upload(feedback_zip, upload_path(job_id))
+        valid = await run_in_threadpool(_has_feedback_folders, upload_path(job_id))
+    except Exception:
+        valid = False
+    if not valid:
+        discard_job(job_id)
+        return JSONResponse({"error": "No 0/1 folders found in ZIP"}, status_code=400)
 
-    all_rows = []
-    unmatched = []
+    submit_job(job_id, incremental, store, export_formats, period)
 
-    for ed in ed_folders:
-        core = ed[1:]
-        mt = "1" + core
+    return {
+        "job_id": job_id,
+        "status_url": str(request.url_for("get_audit_job", job_id=job_id)),
+        "events_url": f"{request.url_for('subscribe')}?job_id={job_id}",
+        "report_url": str(request.url_for("download_audit_job_report", job_id=job_id)),
+    }
 
-        mt_path = os.path.join(feedback_root, mt)
-        ed_path = os.path.join(feedback_root, ed)
 
-        if not os.path.isdir(mt_path):
-            continue
+def _job_state(job_id):
+    state = get_state(job_id) if is_valid_job_id(job_id) else None
+    if state is None:
+        raise HTTPException(status_code=404, detail="Audit job not found")
+    return state
 
-        diffs, unmatched_files = process_folder_pair(
-            mt_path, ed_path, extract_tracking_number(ed)
-        )
 
-        for d in diffs:
-            # Plain text only — no rich text, no runs
-            all_rows.append({
-                "tracking_number": d.get("tracking_number"),
-                "patient": d.get("patient"),
-                "typist": d.get("typist"),
-                "typed": d.get("typed") or d.get("T") or "",
-                "dictated": d.get("dictated") or d.get("D") or "",
-            })
+@router.get("/jobs/{job_id}")
+def get_audit_job(job_id: str):
+    return _job_state(job_id)
+
 
-        unmatched.extend(unmatched_files)
+@router.get("/jobs/{job_id}/report")
+def download_audit_job_report(job_id: str, report_format: str = "xlsx"):
+    state = _job_state(job_id)
+    if state["status"] != "finished":
+        raise HTTPException(status_code=409, detail=f"Audit job is {state['status']}")
 
-    excel_path = write_excel_summary(all_rows, unmatched)
+    report_format = report_format.strip().lower()
+    filename = None
+    if report_format == "xlsx":
+        filename = state["report"]
+    elif report_format in EXPORT_FORMATS:
+        filename = os.path.splitext(state["report"])[0] + f".{report_format}"
+        if filename not in state["exports"]:
+            filename = None
+    if filename is None:
+        raise HTTPException(status_code=404, detail=f"No {report_format} report for this job")
 
     return FileResponse(
-        excel_path,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename=os.path.basename(excel_path)
-    )
\ No newline at end of file
+        os.path.join(output_dir(job_id), filename),
+        media_type=MEDIA_TYPES[report_format],
+        filename=filename
+    )
+
+
+# ------------------------------------------------------------
+# ANALYTICS (recorded audit diffs, grouped)
+# ------------------------------------------------------------
+@router.get("/analytics")
+async def audit_analytics(
+    group_by: str = "typist",
+    start: str = None,
+    end: str = None,
+    typist: str = None,
+    patient: str = None,
+):
+    """
+    Error counts and edit rates from every recorded audit, e.g.
+    ?group_by=typist,period&start=2024-01&end=2024-12 for monthly trends.
+    """
+    columns = [c.strip() for c in group_by.split(",") if c.strip()]
+    try:
+        rows = await run_in_threadpool(error_summary, columns, start, end, typist, patient)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    return {"group_by": columns, "start": start, "end": end, "rows": rows}
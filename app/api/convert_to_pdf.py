@@ -1,45 +1,128 @@
 # app/api/convert_to_pdf.py
 
+import itertools
 import os
 import shutil
-import subprocess
 import tempfile
+import zipfile
 from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.services.conversion_cache import get_conversion_cache
+from app.services.office_pool import get_office_pool
+from app.services.uploads import save_upload
 
 router = APIRouter(tags=["ConvertToPdf"])
 
 ALLOWED_EXTENSIONS = {".doc", ".docx", ".xls", ".xlsx"}
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+
+class _ZipStream:
+    """
+    Write-only file object for zipfile. It cannot seek, so zipfile writes
+    each entry with a data descriptor and the bytes can be sent as they
+    are produced.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
 
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
 
-def run_soffice_convert(input_path: str, output_dir: str, target: str = "pdf"):
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+class _ZipResponse(StreamingResponse):
+    """
+    Streams the ZIP and removes the work directory however the response
+    ends, also when the client disconnects before the first byte.
     """
-    Run LibreOffice headless conversion.
+
+    def __init__(self, content, work_dir, **kwargs):
+        super().__init__(content, **kwargs)
+        self.content = content
+        self.work_dir = work_dir
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                self.content.close()
+            except ValueError:
+                pass    # still running in the threadpool; its own finally cleans up
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def _archive_name(name, used):
+    # "a.pdf", then "a (2).pdf", ... for inputs like a.doc and a.docx
+    stem, ext = os.path.splitext(name)
+    candidate, n = name, 2
+    while candidate.lower() in used:
+        candidate = f"{stem} ({n}){ext}"
+        n += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def _first_converted(converted, errors):
+    # Runs before the response starts: if nothing converts, it is a 500
+    for input_path, output_path, error in converted:
+        if error is None:
+            return input_path, output_path, error
+        errors.append(f"{os.path.basename(input_path)}: {error}")
+    raise RuntimeError(errors[0] if errors else "nothing to convert")
+
+
+def _stream_zip(first, converted, errors, work_dir):
     """
-    cmd = [
-        "soffice",
-        "--headless",
-        "--convert-to",
-        target,
-        "--outdir",
-        output_dir,
-        input_path,
-    ]
+    Adds each PDF to the ZIP as soon as its conversion finishes and sends
+    the bytes right away. Files that failed are listed in
+    conversion_errors.txt.
+    """
+    stream = _ZipStream()
+    names = set()
     try:
-        subprocess.run(
-            cmd,
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(
-            f"LibreOffice conversion failed for {input_path}: "
-            f"{e.stderr.decode(errors='ignore')}"
-        )
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as zf:
+            for input_path, output_path, error in itertools.chain([first], converted):
+                if error is not None:
+                    errors.append(f"{os.path.basename(input_path)}: {error}")
+                    continue
+
+                name = _archive_name(os.path.basename(output_path), names)
+                with open(output_path, "rb") as src, zf.open(name, "w") as dst:
+                    while True:
+                        chunk = src.read(ZIP_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        yield from stream.drain()
+                os.remove(output_path)
+                yield from stream.drain()
+
+            if errors:
+                zf.writestr("conversion_errors.txt", "\n".join(errors) + "\n")
+        yield from stream.drain()
+    finally:
+        converted.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
 
 
 @router.post("/pdf")
@@ -49,65 +132,66 @@ async def convert_to_pdf(
     """
     Accept multiple .doc/.docx/.xls/.xlsx files,
     convert all to PDF using LibreOffice,
-    bundle into a single ZIP,
-    and return it as a download.
+    and stream them back as a single ZIP download.
     """
     if not files:
         raise HTTPException(status_code=400, detail="No files uploaded.")
 
+    for f in files:
+        ext = os.path.splitext(f.filename or "")[1].lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type: {f.filename}",
+            )
+
     work_dir = tempfile.mkdtemp(prefix="convertpdf_")
     input_dir = os.path.join(work_dir, "input")
     output_dir = os.path.join(work_dir, "output")
     os.makedirs(input_dir, exist_ok=True)
     os.makedirs(output_dir, exist_ok=True)
 
+    converted = None
+    errors = []
     try:
-        # Save uploaded files
+        # Spool uploaded files to disk in chunks, each in its own folder
+        # so uploads with the same name do not overwrite each other
         saved_files = []
-        for f in files:
-            filename = f.filename or ""
-            ext = os.path.splitext(filename)[1].lower()
-
-            if ext not in ALLOWED_EXTENSIONS:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file type: {filename}",
-                )
-
-            dest_path = os.path.join(input_dir, filename)
-            with open(dest_path, "wb") as out_f:
-                out_f.write(await f.read())
+        for index, f in enumerate(files):
+            folder = os.path.join(input_dir, str(index))
+            os.makedirs(folder)
+            dest_path = os.path.join(folder, os.path.basename(f.filename))
+            await save_upload(f, dest_path)
             saved_files.append(dest_path)
 
-        # Convert all to PDF
-        for path in saved_files:
-            ext = os.path.splitext(path)[1].lower()
+        # Convert in parallel on the warm LibreOffice pool; the response
+        # starts with the first PDF that is ready
+        converted = get_office_pool().iter_converted(saved_files, output_dir, "pdf")
+        first = await run_in_threadpool(_first_converted, converted, errors)
 
-            # Optional: .doc → .docx first
-            if ext == ".doc":
-                run_soffice_convert(path, input_dir, target="docx")
-                path = os.path.splitext(path)[0] + ".docx"
-
-            run_soffice_convert(path, output_dir, target="pdf")
+    except Exception as e:
+        if converted is not None:
+            converted.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
 
-        # Create ZIP
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        zip_name = f"converted_{timestamp}.zip"
-        zip_path = os.path.join(work_dir, zip_name)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    zip_name = f"converted_{timestamp}.zip"
 
-        shutil.make_archive(
-            base_name=os.path.splitext(zip_path)[0],
-            format="zip",
-            root_dir=output_dir,
-        )
+    return _ZipResponse(
+        _stream_zip(first, converted, errors, work_dir),
+        work_dir,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{zip_name}"'},
+    )
 
-        return FileResponse(
-            zip_path,
-            media_type="application/zip",
-            filename=zip_name,
-        )
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
-    finally:
-        shutil.rmtree(work_dir, ignore_errors=True)
\ No newline at end of file
+@router.get("/cache-stats")
+def conversion_cache_stats():
+    """
+    Hits, misses and size of the converted-file cache (this process).
+    """
+    cache = get_conversion_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.summary()}
@@ -9,8 +9,7 @@ def list_doctors():
 
 @router.get("/sample-count")
 def sample_count(doctor_id: str):
-    files = DoctorProfileService._list_sample_files(doctor_id)
-    return {"count": len(files)}
+    return {"count": DoctorProfileService.sample_count(doctor_id)}
 
 @router.get("/has-samples")
 def has_samples(doctor_id: str):
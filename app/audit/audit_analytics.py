@@ -0,0 +1,262 @@
+import glob
+import os
+import re
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from app.core.file_lock import file_lock
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+AUDIT_ANALYTICS_DIR = os.getenv("AUDIT_ANALYTICS_DIR", "audit_analytics")
+RECORD_BATCH_ROWS = 50_000      # diff records held in memory before spooling
+
+RECORD_COLUMNS = [
+    "period", "tracking_number", "filename", "patient", "typist",
+    "changes", "typed_words", "dictated_words", "audited_at",
+]
+RECORD_SCHEMA = pa.schema([
+    ("period", pa.string()),
+    ("tracking_number", pa.string()),
+    ("filename", pa.string()),
+    ("patient", pa.string()),
+    ("typist", pa.string()),
+    ("changes", pa.int32()),
+    ("typed_words", pa.int32()),
+    ("dictated_words", pa.int32()),
+    ("audited_at", pa.float64()),
+])
+GROUP_COLUMNS = ("typist", "patient", "period", "tracking_number")
+
+
+def parse_period(value):
+    """
+    "YYYY-MM" from a request field, or None when empty.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", value):
+        raise ValueError(f"Invalid period: {value} (expected YYYY-MM)")
+    return value
+
+
+def _period_path(period):
+    return os.path.join(AUDIT_ANALYTICS_DIR, f"{period}.parquet")
+
+
+def _conform(table, columns=RECORD_COLUMNS):
+    # Period files written before a column existed read it as nulls
+    for name in columns:
+        if name not in table.column_names:
+            field = RECORD_SCHEMA.field(name)
+            table = table.append_column(field, pa.nulls(len(table), field.type))
+    return table.select(columns).cast(pa.schema([RECORD_SCHEMA.field(c) for c in columns]))
+
+
+def _read_columns(path, columns):
+    present = set(pq.ParquetFile(path).schema_arrow.names)
+    return [c for c in columns if c in present]
+
+
+# ------------------------------------------------------------
+# RECORDING
+# ------------------------------------------------------------
+class AuditRecords:
+    """
+    One record per diff of an audit run, filed under the feedback month
+    (period) the run audits:
+
+        tracking_number, filename (the MT document), patient, typist,
+        changes (snippets), typed_words, dictated_words
+
+    Collected while the results stream past (see record) in batches of
+    RECORD_BATCH_ROWS, which are spooled to a Parquet file, then merged
+    into the period's file by save. A failure only stops the recording;
+    save raises it afterwards.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.audited_at = time.time()
+        self.tracking_numbers = set()
+        self.columns = self._empty()
+        self.rows = 0
+        self.spool_path = None
+        self.writer = None
+        self.error = None
+
+    @staticmethod
+    def _empty():
+        return {c: [] for c in RECORD_COLUMNS[1:-1]}
+
+    def _flush(self):
+        if not self.rows:
+            return
+        columns = self.columns
+        self.columns, self.rows = self._empty(), 0
+
+        n = len(columns["tracking_number"])
+        table = pa.table(
+            {"period": [self.period] * n, **columns, "audited_at": [self.audited_at] * n},
+            schema=RECORD_SCHEMA,
+        )
+        if self.writer is None:
+            os.makedirs(AUDIT_ANALYTICS_DIR, exist_ok=True)
+            self.spool_path = os.path.join(AUDIT_ANALYTICS_DIR, f".run-{uuid.uuid4().hex}.parquet")
+            self.writer = pq.ParquetWriter(self.spool_path, RECORD_SCHEMA)
+        self.writer.write_table(table)
+
+    def record(self, results):
+        # Pass-through over (tracking_number, diffs, unmatched) results
+        for tracking_number, diffs, unmatched in results:
+            if self.error is not None:
+                yield tracking_number, diffs, unmatched
+                continue
+            self.tracking_numbers.add(tracking_number)
+            for d in diffs:
+                typed = d.get("typed") or ""
+                dictated = d.get("dictated") or ""
+                self.columns["tracking_number"].append(tracking_number)
+                self.columns["filename"].append(d.get("filename"))
+                self.columns["patient"].append(d.get("patient") or "")
+                self.columns["typist"].append(d.get("typist") or "")
+                self.columns["changes"].append(max(typed.count(" | "), dictated.count(" | ")) + 1)
+                self.columns["typed_words"].append(len(typed.split()))
+                self.columns["dictated_words"].append(len(dictated.split()))
+                self.rows += 1
+            if self.rows >= RECORD_BATCH_ROWS:
+                try:
+                    self._flush()
+                except Exception as e:
+                    self.error = e
+                    self.columns, self.rows = self._empty(), 0
+            yield tracking_number, diffs, unmatched
+
+    def _batches(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.spool_path is not None:
+            yield from pq.ParquetFile(self.spool_path).iter_batches()
+
+    def save(self):
+        """
+        Replaces the period's rows for every tracking number of this run,
+        so re-auditing a month never double counts. Both files are copied
+        batch by batch, under a file lock shared by every worker process
+        that writes to AUDIT_ANALYTICS_DIR.
+        """
+        path = _period_path(self.period)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            if self.error is not None:
+                raise self.error
+            self._flush()
+            os.makedirs(AUDIT_ANALYTICS_DIR, exist_ok=True)
+
+            with file_lock(f"{path}.lock"):
+                with pq.ParquetWriter(tmp_path, RECORD_SCHEMA) as writer:
+                    if os.path.exists(path):
+                        replaced = pa.array(sorted(self.tracking_numbers), pa.string())
+                        columns = _read_columns(path, RECORD_COLUMNS)
+                        for batch in pq.ParquetFile(path).iter_batches(columns=columns):
+                            keep = pc.invert(pc.is_in(batch.column("tracking_number"), value_set=replaced))
+                            table = pa.Table.from_batches([batch]).filter(keep)
+                            writer.write_table(_conform(table))
+                    for batch in self._batches():
+                        writer.write_table(pa.Table.from_batches([batch]))
+                os.replace(tmp_path, path)
+            return path
+        finally:
+            self.discard()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def discard(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.spool_path is not None and os.path.exists(self.spool_path):
+            os.remove(self.spool_path)
+        self.spool_path = None
+
+
+# ------------------------------------------------------------
+# QUERIES
+# ------------------------------------------------------------
+def load_records(start=None, end=None, columns=None):
+    """
+    All recorded rows for periods between start and end (inclusive,
+    compared as strings, e.g. "2024-01" .. "2024-12").
+    """
+    paths = []
+    for path in sorted(glob.glob(os.path.join(AUDIT_ANALYTICS_DIR, "*.parquet"))):
+        period = os.path.basename(path)[:-len(".parquet")]
+        if (start and period < start) or (end and period > end):
+            continue
+        paths.append(path)
+
+    columns = list(columns or RECORD_COLUMNS)
+    if not paths:
+        return pd.DataFrame({c: [] for c in columns})
+    tables = [_conform(pq.read_table(p, columns=_read_columns(p, columns)), columns) for p in paths]
+    return pd.concat([t.to_pandas() for t in tables], ignore_index=True)
+
+
+def error_summary(group_by=("typist",), start=None, end=None, typist=None, patient=None):
+    """
+    Grouped error statistics, computed column-wise:
+
+        errors            diff rows (sentences corrected)
+        changes           corrected spans within them
+        documents         documents (MT files) with at least one error
+        tracking_numbers  folders audited with at least one error
+        typed_words / dictated_words
+        errors_per_document, words_per_error
+
+    group_by is any of typist, patient, period, tracking_number; "period"
+    gives the month-by-month trend.
+    """
+    group_by = list(group_by)
+    if not group_by:
+        raise ValueError(f"group_by needs at least one of: {', '.join(GROUP_COLUMNS)}")
+    for column in group_by:
+        if column not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by {column}")
+
+    df = load_records(start, end, RECORD_COLUMNS[:-1])
+    if typist:
+        df = df[df["typist"] == typist]
+    if patient:
+        df = df[df["patient"] == patient]
+
+    if df.empty:
+        return []
+
+    # One integer id per (tracking number, MT file) document, so distinct
+    # documents are counted like any other column. Rows recorded before
+    # filenames were kept fall back to the patient name.
+    df = df.assign(filename=df["filename"].fillna(df["patient"]))
+    df = df.assign(document=df.groupby(["tracking_number", "filename"], sort=False).ngroup())
+
+    summary = df.groupby(group_by, sort=True).agg(
+        errors=("document", "size"),
+        changes=("changes", "sum"),
+        documents=("document", "nunique"),
+        tracking_numbers=("tracking_number", "nunique"),
+        typed_words=("typed_words", "sum"),
+        dictated_words=("dictated_words", "sum"),
+    )
+    summary["errors_per_document"] = (summary["errors"] / summary["documents"]).round(3)
+    summary["words_per_error"] = (
+        (summary["typed_words"] + summary["dictated_words"]) / summary["errors"]
+    ).round(2)
+
+    return summary.reset_index().to_dict(orient="records")
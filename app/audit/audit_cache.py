@@ -0,0 +1,167 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.audit.word_diff import WORD_DIFF_BACKEND
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+AUDIT_CACHE_ENABLED = os.getenv("AUDIT_CACHE", "1") != "0"
+AUDIT_CACHE_PATH = os.getenv("AUDIT_CACHE_PATH", os.path.join("cache", "audit_cache.sqlite3"))
+AUDIT_CACHE_MAX_BYTES = int(os.getenv("AUDIT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Bump when extraction or diff output changes, so stale entries are ignored
+TEXT_VERSION = "1"
+DIFF_VERSION = "1"
+
+EVICT_TO = 0.9              # evict down to 90% of the cap
+EVICT_CHECK_EVERY = 0.05    # re-check the total after writing 5% of the cap
+TOUCH_BATCH = 256           # LRU timestamps written per batch of cache hits
+
+
+class AuditCache:
+    """
+    Content-addressed store for extracted document text (keyed by the
+    document hash) and compare_sentences output (keyed by the MT/ED hash
+    pair), in one SQLite file with size-bounded LRU eviction.
+
+    Safe to share between audit workers: each process and thread opens its
+    own connection (see get_audit_cache) and SQLite runs in WAL mode.
+    Hits only read; their LRU timestamps are written in batches, with the
+    next put or every TOUCH_BATCH hits, so readers do not queue on the
+    WAL write lock.
+    """
+
+    def __init__(self, path=AUDIT_CACHE_PATH, max_bytes=AUDIT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._written = 0
+        self._touched = {}      # (kind, key) -> last hit, not yet written
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+    # ------------------------------------------------------------
+    # LOW LEVEL
+    # ------------------------------------------------------------
+    def _get(self, kind, key):
+        row = self.conn.execute(
+            "SELECT value FROM entries WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row is None:
+            return None
+        self._touched[(kind, key)] = time.time()
+        if len(self._touched) >= TOUCH_BATCH:
+            self._flush_touched()
+        return row[0]
+
+    def _flush_touched(self):
+        touched, self._touched = self._touched, {}
+        if touched:
+            self.conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE kind = ? AND key = ?",
+                [(used, kind, key) for (kind, key), used in touched.items()],
+            )
+
+    def _put(self, kind, key, value):
+        size = len(value.encode("utf-8"))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries (kind, key, value, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            (kind, key, value, size, time.time()),
+        )
+        self._flush_touched()
+        self._written += size
+        if self._written >= self.max_bytes * EVICT_CHECK_EVERY:
+            self._written = 0
+            self.evict()
+
+    def total_size(self):
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self):
+        """
+        Drops least-recently-used entries until the cache fits its cap.
+        """
+        self._flush_touched()
+        excess = self.total_size() - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        target = excess + self.max_bytes * (1 - EVICT_TO)
+        victims = []
+        freed = 0
+        for kind, key, size in self.conn.execute(
+            "SELECT kind, key, size FROM entries ORDER BY last_used"
+        ):
+            victims.append((kind, key))
+            freed += size
+            if freed >= target:
+                break
+
+        self.conn.executemany("DELETE FROM entries WHERE kind = ? AND key = ?", victims)
+        return len(victims)
+
+    # ------------------------------------------------------------
+    # DOCUMENT TEXT
+    # ------------------------------------------------------------
+    def get_text(self, doc_hash):
+        return self._get("text", f"{TEXT_VERSION}:{doc_hash}")
+
+    def put_text(self, doc_hash, text):
+        self._put("text", f"{TEXT_VERSION}:{doc_hash}", text)
+
+    # ------------------------------------------------------------
+    # SENTENCE DIFFS
+    # ------------------------------------------------------------
+    # Keyed by diff backend too: backends may place snippets differently
+    def get_diffs(self, mt_hash, ed_hash):
+        value = self._get("diffs", f"{DIFF_VERSION}:{WORD_DIFF_BACKEND}:{mt_hash}:{ed_hash}")
+        return json.loads(value) if value is not None else None
+
+    def put_diffs(self, mt_hash, ed_hash, diffs):
+        self._put("diffs", f"{DIFF_VERSION}:{WORD_DIFF_BACKEND}:{mt_hash}:{ed_hash}", json.dumps(diffs))
+
+    def close(self):
+        self._flush_touched()
+        self.conn.close()
+
+
+_local = threading.local()
+
+
+def get_audit_cache():
+    """
+    Returns this thread's AuditCache, or None when AUDIT_CACHE=0.
+    """
+    if not AUDIT_CACHE_ENABLED:
+        return None
+
+    # SQLite connections cannot cross threads, and worker processes must not
+    # reuse a connection inherited through fork. A thread's cache (and its
+    # connection) goes away with the thread.
+    cache = getattr(_local, "cache", None)
+    if cache is None or _local.pid != os.getpid():
+        cache = _local.cache = AuditCache()
+        _local.pid = os.getpid()
+    return cache
@@ -1,15 +1,23 @@
 import os
+import io
 import re
-import difflib
+import tempfile
 from datetime import datetime
-from docx import Document
 import sys
 
 if sys.platform == "win32":
     import pythoncom
     import win32com.client
 
+from app.audit.audit_cache import get_audit_cache
 from app.audit.audit_excel_writer import write_excel_summary
+from app.audit.doc_converter import convert_docs_to_docx, soffice_available
+from app.audit.doc_text import read_doc_text
+from app.audit.filename_pairing import pair_filenames
+from app.audit.sentence_alignment import split_sentences, align_sentences
+from app.audit.word_diff import get_opcodes
+from app.core.hashing import document_hash
+from app.services.docx_text import iter_docx_paragraphs
 
 # ------------------------------------------------------------
 # CONFIGURATION
@@ -29,6 +37,35 @@ def extract_tracking_number(folder_name):
     return prefix + timestamp
 
 
+# ------------------------------------------------------------
+# FOLDER DISCOVERY
+# ------------------------------------------------------------
+def list_folder_pairs(feedback_root):
+    """
+    Returns (tracking_number, mt_path, ed_path) for every 0xxxx (ED) folder
+    that has a matching 1xxxx (MT) folder, sorted by folder name.
+    """
+    folders = sorted(
+        f for f in os.listdir(feedback_root)
+        if os.path.isdir(os.path.join(feedback_root, f))
+    )
+
+    pairs = []
+    for ed in folders:
+        if not ed.startswith("0"):
+            continue
+
+        mt_path = os.path.join(feedback_root, "1" + ed[1:])
+        ed_path = os.path.join(feedback_root, ed)
+
+        if not os.path.isdir(mt_path):
+            continue
+
+        pairs.append((extract_tracking_number(ed), mt_path, ed_path))
+
+    return pairs
+
+
 # ------------------------------------------------------------
 # HELPERS
 # ------------------------------------------------------------
@@ -40,8 +77,7 @@ def extract_last_name(filename):
 
 def read_docx_text(path):
     try:
-        doc = Document(path)
-        return "\n".join([p.text for p in doc.paragraphs])
+        return "\n".join(iter_docx_paragraphs(path))
     except Exception:
         return ""
 
@@ -92,6 +128,95 @@ def convert_doc_to_docx(doc_path):
     return None
 
 
+def _read_native_text(filename, source):
+    # .docx always yields text ("" if unreadable); .doc None if not parseable
+    if filename.lower().endswith(".docx"):
+        return read_docx_text(io.BytesIO(source) if isinstance(source, bytes) else source)
+    return read_doc_text(source)
+
+
+def _convert_with_word(filename, source):
+    if isinstance(source, bytes):
+        # Word needs a real file to convert
+        with tempfile.TemporaryDirectory(prefix="audit_doc_") as tmp:
+            path = os.path.join(tmp, os.path.basename(filename))
+            with open(path, "wb") as f:
+                f.write(source)
+            return _convert_with_word(filename, path)
+
+    docx_path = convert_doc_to_docx(source)
+    if not docx_path:
+        return None
+    return read_docx_text(docx_path)
+
+
+def load_documents(documents, cache=None, hashes=None):
+    """
+    Returns {key: text or None} for {key: (filename, source)}, where source
+    is a path on disk or the document bytes (ZIP member).
+
+    With an AuditCache (and the documents' content hashes), text already
+    extracted in an earlier run is served from the cache.
+
+    Legacy .doc files are read natively from their OLE2 streams. The few
+    the native reader cannot handle are converted together in batched
+    LibreOffice calls, then one by one through Word where available.
+    """
+    texts = {}
+    legacy = {}
+    cached = set()
+
+    for key, (filename, source) in documents.items():
+        text = cache.get_text(hashes[key]) if cache else None
+        if text is not None:
+            texts[key] = text
+            cached.add(key)
+            continue
+
+        text = _read_native_text(filename, source)
+        if text is None:
+            legacy[key] = source
+        else:
+            texts[key] = text
+
+    converted = convert_docs_to_docx(legacy) if legacy and soffice_available() else {}
+
+    for key, source in legacy.items():
+        if key in converted:
+            texts[key] = read_docx_text(io.BytesIO(converted[key]))
+        else:
+            texts[key] = _convert_with_word(documents[key][0], source)
+
+    if cache:
+        for key, text in texts.items():
+            if text is not None and key not in cached:
+                cache.put_text(hashes[key], text)
+
+    return texts
+
+
+def load_document_text(filename, source):
+    return load_documents({filename: (filename, source)})[filename]
+
+
+def folder_documents(folder):
+    """
+    Returns {filename: source} for the .doc/.docx files of a folder pair side.
+    folder is a directory path, or an in-memory {filename: bytes} folder.
+    """
+    if isinstance(folder, dict):
+        return {
+            f: data for f, data in sorted(folder.items())
+            if f.lower().endswith((".doc", ".docx"))
+        }
+
+    return {
+        f: os.path.join(folder, f)
+        for f in sorted(os.listdir(folder))
+        if f.lower().endswith((".doc", ".docx"))
+    }
+
+
 def remove_doc_duplicates(files):
     cleaned = []
     docx_basenames = {f[:-5] for f in files if f.lower().endswith(".docx")}
@@ -107,14 +232,14 @@ def remove_doc_duplicates(files):
 # ------------------------------------------------------------
 # MINIMAL DIFFERENCE EXTRACTOR
 # ------------------------------------------------------------
-def extract_minimal_change(mt_sentence, ed_sentence, context_words=5):
+def extract_minimal_change(mt_sentence, ed_sentence, context_words=5, backend=None):
     mt_words = mt_sentence.split()
     ed_words = ed_sentence.split()
 
-    matcher = difflib.SequenceMatcher(None, mt_words, ed_words)
+    # Word-level alignment from the configured diff backend (AUDIT_DIFF_BACKEND)
     diffs = []
 
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+    for tag, i1, i2, j1, j2 in get_opcodes(mt_words, ed_words, backend):
         if tag != "equal":
             mt_block = " ".join(mt_words[i1:i2]).strip()
             ed_block = " ".join(ed_words[j1:j2]).strip()
@@ -140,37 +265,17 @@ def extract_minimal_change(mt_sentence, ed_sentence, context_words=5):
     return " | ".join(mt_snippets), " | ".join(ed_snippets)
 
 
-# ------------------------------------------------------------
-# COLOR RUN BUILDER
-# ------------------------------------------------------------
-def build_runs(sentence, mode):
-    """
-    mode = 'typed' or 'dictated'
-    typed = red
-    dictated = blue
-    """
-    color = "FF0000" if mode == "typed" else "0000FF"
-    return [(sentence, color)]
-
-
 # ------------------------------------------------------------
 # SENTENCE COMPARATOR
 # ------------------------------------------------------------
 def compare_sentences(mt_text, ed_text):
-    mt_sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', mt_text) if s.strip()]
-    ed_sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', ed_text) if s.strip()]
+    mt_sentences = split_sentences(mt_text)
+    ed_sentences = split_sentences(ed_text)
 
     diffs = []
-    for mt in mt_sentences:
-        best_match = None
-        best_ratio = 0
-        for ed in ed_sentences:
-            ratio = difflib.SequenceMatcher(None, mt, ed).ratio()
-            if ratio > best_ratio:
-                best_ratio = ratio
-                best_match = ed
+    for mt, best_match, best_ratio in align_sentences(mt_sentences, ed_sentences):
         if best_ratio < 1.0:
-            t_change, d_change = extract_minimal_change(mt, best_match)
+            t_change, d_change = extract_minimal_change(mt, best_match or "")
             diffs.append({"T": t_change, "D": d_change})
     return diffs
 
@@ -179,58 +284,60 @@ def compare_sentences(mt_text, ed_text):
 # PROCESS FOLDER PAIR
 # ------------------------------------------------------------
 def process_folder_pair(mt_folder, ed_folder, tracking_number):
-    mt_files = [f for f in os.listdir(mt_folder) if f.lower().endswith((".doc", ".docx"))]
-    ed_files = [f for f in os.listdir(ed_folder) if f.lower().endswith((".doc", ".docx"))]
+    mt_documents = folder_documents(mt_folder)
+    ed_documents = folder_documents(ed_folder)
 
-    diffs_output = []
-    unmatched = []
+    # Pair filenames first (one ED file per MT file), then load only the
+    # matched documents, together, so any .doc needing conversion goes in
+    # one batch
+    matches = pair_filenames(mt_documents, ed_documents)
 
-    for mt_file in mt_files:
-        mt_path = os.path.join(mt_folder, mt_file)
-        mt_docx = convert_doc_to_docx(mt_path)
-        if not mt_docx:
-            unmatched.append({"tracking_number": tracking_number, "folder": "MT", "filename": mt_file})
-            continue
+    needed = {("MT", f): (f, mt_documents[f]) for f in matches}
+    needed.update({("ED", f): (f, ed_documents[f]) for f in matches.values()})
 
-        mt_text = read_docx_text(mt_docx)
+    # Unchanged documents and pairs are served from the content-addressed cache
+    cache = get_audit_cache()
+    hashes = {key: document_hash(source) for key, (f, source) in needed.items()} if cache else {}
+    texts = load_documents(needed, cache, hashes)
 
-        best_match = None
-        best_ratio = 0
-        for ed_file in ed_files:
-            ratio = difflib.SequenceMatcher(None, mt_file, ed_file).ratio()
-            if ratio > best_ratio:
-                best_ratio = ratio
-                best_match = ed_file
+    diffs_output = []
+    unmatched = []
 
-        if best_ratio < 0.70:
+    for mt_file in mt_documents:
+        mt_text = texts[("MT", mt_file)] if mt_file in matches else None
+        if mt_text is None:
             unmatched.append({"tracking_number": tracking_number, "folder": "MT", "filename": mt_file})
             continue
 
-        ed_path = os.path.join(ed_folder, best_match)
-        ed_docx = convert_doc_to_docx(ed_path)
-        if not ed_docx:
+        best_match = matches[mt_file]
+        ed_text = texts[("ED", best_match)]
+        if ed_text is None:
             unmatched.append({"tracking_number": tracking_number, "folder": "ED", "filename": best_match})
             continue
 
-        ed_text = read_docx_text(ed_docx)
         typist = extract_typist_initials(ed_text)
 
-        differences = compare_sentences(mt_text, ed_text)
+        if cache:
+            mt_hash, ed_hash = hashes[("MT", mt_file)], hashes[("ED", best_match)]
+            differences = cache.get_diffs(mt_hash, ed_hash)
+            if differences is None:
+                differences = compare_sentences(mt_text, ed_text)
+                cache.put_diffs(mt_hash, ed_hash, differences)
+        else:
+            differences = compare_sentences(mt_text, ed_text)
+
         last_name = extract_last_name(mt_file)
 
         for d in differences:
             diffs_output.append({
                 "tracking_number": tracking_number,
+                "filename": mt_file,
                 "patient": last_name,
                 "typist": typist,
 
                 # Excel writer expects these:
                 "typed": d["T"],
                 "dictated": d["D"],
-
-                # Color runs:
-                "typed_runs": build_runs(d["T"], "typed"),
-                "dictated_runs": build_runs(d["D"], "dictated")
             })
 
     return diffs_output, unmatched
@@ -242,29 +349,10 @@ def process_folder_pair(mt_folder, ed_folder, tracking_number):
 if __name__ == "__main__":
     feedback_root = r"D:\AuditEngine\Feedback"
 
-    all_diffs = []
-    unmatched = []
-
-    folders = [f for f in os.listdir(feedback_root) if os.path.isdir(os.path.join(feedback_root, f))]
-
-    mt_folders = [f for f in folders if f.startswith("1")]
-    ed_folders = [f for f in folders if f.startswith("0")]
-
-    for ed in ed_folders:
-        core = ed[1:]
-        mt = "1" + core
+    from app.audit.audit_executor import iter_folder_pair_results
+    from app.audit.audit_pipeline import iter_audit_rows
 
-        mt_path = os.path.join(feedback_root, mt)
-        ed_path = os.path.join(feedback_root, ed)
-
-        if not os.path.isdir(mt_path):
-            continue
-
-        diffs, unmatched_files = process_folder_pair(
-            mt_path, ed_path, extract_tracking_number(ed)
-        )
-
-        all_diffs.extend(diffs)
-        unmatched.extend(unmatched_files)
+    unmatched = []
+    rows = iter_audit_rows(iter_folder_pair_results(list_folder_pairs(feedback_root)), unmatched)
 
-    write_excel_summary(all_diffs, unmatched)
\ No newline at end of file
+    write_excel_summary(rows, unmatched)
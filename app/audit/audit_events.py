@@ -1,28 +1,83 @@
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
+from typing import Optional
 import asyncio
-from app.audit.audit_state import get_state
+import json
+import os
+from app.audit.audit_state import get_state, is_local_job
 
 router = APIRouter()
 
-subscribers = set()
+subscribers = {}    # queue -> (event loop, job id or None for every event)
 
-async def event_stream():
+FINAL_STATUSES = ("finished", "failed")
+
+# Seconds between reads of the shared state of a job another instance runs
+AUDIT_EVENTS_POLL = float(os.getenv("AUDIT_EVENTS_POLL", "2"))
+
+
+def _state_event(state):
+    return f"data: {json.dumps({'event': 'state', **state})}\n\n"
+
+
+async def event_stream(job_id=None):
     queue = asyncio.Queue()
-    subscribers.add(queue)
+    subscribers[queue] = (asyncio.get_running_loop(), job_id)
     try:
+        state = None
+        if job_id is not None:
+            # Late subscribers get the job's current state first
+            state = get_state(job_id)
+            if state is not None:
+                yield _state_event(state)
+                if state.get("status") in FINAL_STATUSES:
+                    return
+
+        # Another instance's job never broadcasts here: its state file in
+        # the shared workspace is read every AUDIT_EVENTS_POLL seconds, and
+        # each change is sent as a state event
+        remote = job_id is not None and not is_local_job(job_id)
+
         while True:
-            data = await queue.get()
+            if not remote:
+                data = await queue.get()
+            else:
+                try:
+                    data = await asyncio.wait_for(queue.get(), AUDIT_EVENTS_POLL)
+                except asyncio.TimeoutError:
+                    current = get_state(job_id)
+                    if current is None:
+                        return      # discarded
+                    if current != state:
+                        state = current
+                        yield _state_event(state)
+                        if state.get("status") in FINAL_STATUSES:
+                            return
+                    continue
+            if data is None:
+                return
             yield f"data: {data}\n\n"
     finally:
-        subscribers.remove(queue)
+        subscribers.pop(queue, None)
 
 
 @router.get("/subscribe")
-async def subscribe():
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+async def subscribe(job_id: Optional[str] = None):
+    return StreamingResponse(event_stream(job_id), media_type="text/event-stream")
 
 
-def broadcast(message: str):
-    for q in list(subscribers):
-        q.put_nowait(message)
\ No newline at end of file
+def broadcast(message: str, job_id: Optional[str] = None, last: bool = False):
+    """
+    Sends message to every subscriber, and to those of job_id. last=True
+    also ends the job's streams. Safe to call from worker threads.
+    """
+    for q, (loop, wanted) in list(subscribers.items()):
+        if wanted is not None and wanted != job_id:
+            continue
+        try:
+            loop.call_soon_threadsafe(q.put_nowait, message)
+            if last and wanted is not None:
+                loop.call_soon_threadsafe(q.put_nowait, None)
+        except RuntimeError:
+            # Subscriber's event loop already closed
+            subscribers.pop(q, None)
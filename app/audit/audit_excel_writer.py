@@ -1,43 +1,68 @@
+import itertools
 import os
+import pickle
+import tempfile
 from datetime import datetime
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Alignment
 
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+WRAP_ALIGNMENT = Alignment(wrap_text=True)
 
-def autosize_columns(ws):
-    for column_cells in ws.columns:
-        max_length = 0
-        column = column_cells[0].column
-        for cell in column_cells:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws.column_dimensions[get_column_letter(column)].width = max_length + 2
 
-
-def write_excel_summary(all_rows, unmatched):
+class _ColumnWidths:
+    """
+    Tracks autosized column widths while rows stream past: the longest
+    non-empty value per column, plus 2 (same rule autosize used to apply).
     """
-    Final legacy format:
 
-    A: Tracking Number (only on first row of group)
-    B: Patient
-    C: Typist (initials only, blank if none)
-    D: Multi-line cell:
-           Dictated: <dictated>
-           Typed: <typed>
+    def __init__(self, columns):
+        self.max_lengths = [0] * columns
+
+    def update(self, values):
+        for i, value in enumerate(values):
+            if value:
+                self.max_lengths[i] = max(self.max_lengths[i], len(str(value)))
+
+    def apply(self, ws):
+        for i, length in enumerate(self.max_lengths, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = length + 2
+
+
+class RowSpool:
+    """
+    Rows written to a temporary file, then read back in order as many times
+    as needed. Write-only sheets need their widths before the first row,
+    and this keeps memory flat whatever the row count.
     """
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Audit Summary"
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.count = 0
+
+    def append(self, values):
+        pickle.dump(values, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.count += 1
+
+    def extend(self, rows):
+        for values in rows:
+            self.append(values)
 
-    # Header row
-    headers = ["Tracking Number", "Patient", "Typist", "Diff"]
-    ws.append(headers)
+    def __iter__(self):
+        self.file.seek(0)
+        while True:
+            try:
+                yield pickle.load(self.file)
+            except EOFError:
+                return
 
-    for cell in ws[1]:
-        cell.alignment = Alignment(horizontal="center", vertical="center")
+    def close(self):
+        self.file.close()
 
+
+def _summary_rows(all_rows):
     last_tracking = None
 
     for row in all_rows:
@@ -54,31 +79,90 @@ def write_excel_summary(all_rows, unmatched):
         # Only show tracking number on first row of group
         tracking_cell = tracking if tracking != last_tracking else ""
 
-        ws.append([
-            tracking_cell,
-            patient,
-            typist,
-            diff_block
-        ])
-
-        # Ensure multi-line display
-        ws[f"D{ws.max_row}"].alignment = Alignment(wrap_text=True)
+        yield [tracking_cell, patient, typist, diff_block]
 
         last_tracking = tracking
 
-    autosize_columns(ws)
+
+def _unmatched_label(item):
+    if isinstance(item, dict):
+        return f"{item.get('tracking_number', '')} [{item.get('folder', '')}] {item.get('filename', '')}".strip()
+    return item
+
+
+def _write_sheet(wb, title, headers, rows, wrap_last_column=False):
+    widths = _ColumnWidths(len(headers))
+    widths.update(headers)
+
+    spool = RowSpool()
+    try:
+        for values in rows:
+            widths.update(values)
+            spool.append(values)
+
+        ws = wb.create_sheet(title)
+        widths.apply(ws)
+
+        header_cells = []
+        for value in headers:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.alignment = HEADER_ALIGNMENT
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        for values in spool:
+            if wrap_last_column:
+                # Ensure multi-line display
+                cell = WriteOnlyCell(ws, value=values[-1])
+                cell.alignment = WRAP_ALIGNMENT
+                values = values[:-1] + [cell]
+            ws.append(values)
+    finally:
+        spool.close()
+
+
+def write_excel_summary(all_rows, unmatched, output_dir="output"):
+    """
+    Final legacy format:
+
+    A: Tracking Number (only on first row of group)
+    B: Patient
+    C: Typist (initials only, blank if none)
+    D: Multi-line cell:
+           Dictated: <dictated>
+           Typed: <typed>
+
+    all_rows and unmatched may be any iterables (e.g. generators); rows are
+    streamed into a write-only workbook, so memory does not grow with them.
+    unmatched is only read once all_rows is exhausted, so it may be a list
+    that the rows generator is still filling.
+    """
+
+    wb = Workbook(write_only=True)
+
+    _write_sheet(
+        wb,
+        "Audit Summary",
+        ["Tracking Number", "Patient", "Typist", "Diff"],
+        _summary_rows(all_rows),
+        wrap_last_column=True,
+    )
 
     # Optional unmatched sheet
-    if unmatched:
-        ws2 = wb.create_sheet("Unmatched Files")
-        ws2.append(["Unmatched File"])
-        for item in unmatched:
-            ws2.append([item])
-        autosize_columns(ws2)
-
-    os.makedirs("output", exist_ok=True)
+    unmatched_rows = ([_unmatched_label(item)] for item in unmatched)
+    first = next(unmatched_rows, None)
+    if first is not None:
+        _write_sheet(
+            wb,
+            "Unmatched Files",
+            ["Unmatched File"],
+            itertools.chain([first], unmatched_rows),
+        )
+
+    os.makedirs(output_dir, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    path = os.path.join("output", f"audit_summary_{timestamp}.xlsx")
+    path = os.path.join(output_dir, f"audit_summary_{timestamp}.xlsx")
     wb.save(path)
 
-    return path
\ No newline at end of file
+    return path
+
@@ -0,0 +1,79 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from app.audit.audit_engine import process_folder_pair
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+# AUDIT_WORKERS=1 runs folder pairs serially in the calling process.
+AUDIT_WORKERS = int(os.getenv("AUDIT_WORKERS", "0")) or os.cpu_count() or 1
+
+
+def _run_pair(pair):
+    tracking_number, mt_folder, ed_folder = pair
+    return process_folder_pair(mt_folder, ed_folder, tracking_number)
+
+
+def _ordered_results(pool, pairs, window, reuse=None):
+    # Keeps at most `window` pairs in flight, so a lazy source of in-memory
+    # folders (FeedbackArchive.iter_folder_pairs) is never read all at once.
+    # Finished results at the head go out right away, without waiting for
+    # the window to fill.
+    pending = deque()
+    for pair in pairs:
+        result = reuse(pair) if reuse else None
+        if result is None:
+            future = pool.submit(_run_pair, pair)
+        else:
+            future = Future()
+            future.set_result(result)
+        pending.append((pair[0], future))
+        while pending and (len(pending) >= window or pending[0][1].done()):
+            tracking_number, future = pending.popleft()
+            yield (tracking_number, *future.result())
+    while pending:
+        tracking_number, future = pending.popleft()
+        yield (tracking_number, *future.result())
+
+
+def iter_folder_pair_results(pairs, max_workers=None, reuse=None):
+    """
+    Runs process_folder_pair for every (tracking_number, mt_folder, ed_folder)
+    and yields (tracking_number, diffs, unmatched) in the order of `pairs`,
+    whichever worker finishes first. Folders are directory paths or
+    {filename: bytes}.
+
+    reuse(pair), if given, is called for each pair in order, in the calling
+    thread; it returns (diffs, unmatched) for a pair that needs no
+    processing (see audit_store.iter_incremental), or None.
+
+    Blocking — iterate it from a thread (run_in_threadpool), not the event loop.
+    """
+    workers = max_workers or AUDIT_WORKERS
+
+    if workers <= 1:
+        for pair in pairs:
+            result = reuse(pair) if reuse else None
+            diffs, unmatched = result if result is not None else _run_pair(pair)
+            yield pair[0], diffs, unmatched
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _ordered_results(pool, pairs, workers * 2, reuse)
+
+
+def run_folder_pairs(pairs, max_workers=None, progress=None):
+    """
+    Like iter_folder_pair_results, merged into (all_diffs, unmatched).
+    progress(tracking_number) is called as each folder pair completes.
+    """
+    all_diffs = []
+    unmatched = []
+    for tracking_number, diffs, unmatched_files in iter_folder_pair_results(pairs, max_workers):
+        all_diffs.extend(diffs)
+        unmatched.extend(unmatched_files)
+        if progress:
+            progress(tracking_number)
+    return all_diffs, unmatched
@@ -0,0 +1,110 @@
+import os
+
+import pandas as pd
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+ROW_COLUMNS = ["tracking_number", "patient", "typist", "typed", "dictated"]
+UNMATCHED_COLUMNS = ["tracking_number", "folder", "filename"]
+
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_FORMATS = ("parquet", "csv", "ndjson")
+EXPORT_CHUNK_ROWS = 10000
+
+
+def parse_export_formats(value):
+    """
+    "parquet, csv" -> ["parquet", "csv"]. Raises ValueError on unknown formats.
+    """
+    formats = []
+    for fmt in (value or "").split(","):
+        fmt = fmt.strip().lower()
+        if not fmt or fmt in formats:
+            continue
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        formats.append(fmt)
+    return formats
+
+
+def _unmatched_record(item):
+    if isinstance(item, dict):
+        return item
+    return {"filename": item}
+
+
+def _frames(records, columns, chunk_rows):
+    # One column per field, tracking number on every row; everything is text
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_rows:
+            yield pd.DataFrame.from_records(chunk, columns=columns).fillna("").astype(str)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame.from_records(chunk, columns=columns).fillna("").astype(str)
+
+
+def _write_frames(records, columns, path, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Chunk by chunk, so memory does not grow with the row count
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(c, pa.string()) for c in columns])
+        with pq.ParquetWriter(path, schema) as writer:
+            for df in _frames(records, columns, chunk_rows):
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+        return
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            f.write(",".join(columns) + "\n")
+        for df in _frames(records, columns, chunk_rows):
+            if fmt == "csv":
+                df.to_csv(f, index=False, header=False)
+            elif fmt == "ndjson":
+                df.to_json(f, orient="records", lines=True, force_ascii=False)
+
+
+def write_audit_exports(all_rows, unmatched, formats, base_path):
+    """
+    Writes the audit rows in each requested format next to the Excel
+    summary, as base_path + ".<format>", with one column per field:
+
+        tracking_number, patient, typist, typed, dictated
+
+    Unmatched files go to base_path + "_unmatched.<format>" when there are
+    any. Returns the paths written.
+
+    Rows are written in chunks of EXPORT_CHUNK_ROWS and read once per
+    format, so pass a list or a RowSpool rather than a generator when
+    asking for several formats.
+    """
+    if not formats:
+        return []
+
+    folder = os.path.dirname(base_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    unmatched = [_unmatched_record(u) for u in unmatched]
+
+    paths = []
+    for fmt in formats:
+        path = f"{base_path}.{fmt}"
+        _write_frames(all_rows, ROW_COLUMNS, path, fmt)
+        paths.append(path)
+
+        if unmatched:
+            path = f"{base_path}_unmatched.{fmt}"
+            _write_frames(unmatched, UNMATCHED_COLUMNS, path, fmt)
+            paths.append(path)
+
+    return paths
@@ -0,0 +1,109 @@
+import posixpath
+import zipfile
+from collections import Counter
+
+from app.audit.audit_engine import extract_tracking_number
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+DOCUMENT_EXTENSIONS = (".doc", ".docx")
+
+
+# ------------------------------------------------------------
+# ZIP INDEX
+# ------------------------------------------------------------
+class FeedbackArchive:
+    """
+    Indexes the 0xxxx / 1xxxx folder structure straight from the ZIP
+    central directory. Nothing is extracted: each folder's documents are
+    read as {filename: bytes} when its pair is processed.
+    """
+
+    def __init__(self, fileobj):
+        self.zip = zipfile.ZipFile(fileobj, "r")
+        self.documents = {}     # folder path -> {filename: member name}
+        self.subfolders = {}    # folder path -> set of child folder names
+
+        for info in self.zip.infolist():
+            name = info.filename.replace("\\", "/")
+            if info.is_dir():
+                self._add_folder(name.rstrip("/"))
+                continue
+
+            folder, filename = posixpath.split(name)
+            self._add_folder(folder)
+            if filename.lower().endswith(DOCUMENT_EXTENSIONS):
+                self.documents.setdefault(folder, {})[filename] = info.filename
+
+        self.feedback_root = self._find_feedback_root()
+
+    def _add_folder(self, folder):
+        # Every parent of a file is a folder, even without a dir entry
+        while folder:
+            self.subfolders.setdefault(folder, set())
+            parent, child = posixpath.split(folder)
+            siblings = self.subfolders.setdefault(parent, set())
+            if child in siblings:
+                break
+            siblings.add(child)
+            folder = parent
+
+    def _find_feedback_root(self):
+        # Shallowest folder (archive root first) holding 0xxxx / 1xxxx folders
+        for folder in sorted(self.subfolders, key=lambda f: (f.count("/") + bool(f), f)):
+            if any(d.startswith("0") or d.startswith("1") for d in self.subfolders[folder]):
+                return folder
+        return None
+
+    def folder_pairs(self):
+        """
+        Returns (tracking_number, mt_folder, ed_folder) for every ED folder
+        with a matching MT folder, sorted by folder name.
+        """
+        if self.feedback_root is None:
+            return []
+
+        children = self.subfolders[self.feedback_root]
+
+        pairs = []
+        for ed in sorted(children):
+            if not ed.startswith("0") or "1" + ed[1:] not in children:
+                continue
+            pairs.append((
+                extract_tracking_number(ed),
+                posixpath.join(self.feedback_root, "1" + ed[1:]),
+                posixpath.join(self.feedback_root, ed),
+            ))
+        return pairs
+
+    def period(self):
+        """
+        The feedback month ("YYYY-MM") the archive covers: the most common
+        modification month of its documents, or None if it has none.
+        ZIP default dates (1980) are ignored.
+        """
+        months = Counter()
+        for members in self.documents.values():
+            for member in members.values():
+                year, month = self.zip.getinfo(member).date_time[:2]
+                if year > 1980:
+                    months[f"{year:04d}-{month:02d}"] += 1
+        return months.most_common(1)[0][0] if months else None
+
+    def read_folder(self, folder):
+        return {
+            filename: self.zip.read(member)
+            for filename, member in sorted(self.documents.get(folder, {}).items())
+        }
+
+    def iter_folder_pairs(self):
+        """
+        Yields (tracking_number, mt_documents, ed_documents) one pair at a
+        time, ready for process_folder_pair / run_folder_pairs.
+        """
+        for tracking_number, mt_folder, ed_folder in self.folder_pairs():
+            yield tracking_number, self.read_folder(mt_folder), self.read_folder(ed_folder)
+
+    def close(self):
+        self.zip.close()
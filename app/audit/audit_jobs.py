@@ -0,0 +1,163 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.audit.audit_events import broadcast
+from app.audit.audit_input import FeedbackArchive
+from app.audit.audit_pipeline import run_audit
+from app.audit.audit_state import AUDIT_JOBS_DIR, forget_job, get_state, job_dir, job_owner, update_job
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+AUDIT_JOB_WORKERS = int(os.getenv("AUDIT_JOB_WORKERS", "2"))           # audits at once
+AUDIT_JOB_TTL = int(os.getenv("AUDIT_JOB_TTL", str(24 * 60 * 60)))    # seconds kept after finishing
+# Seconds without a state update after which another host's unfinished job
+# is taken to be lost (progress updates come with every folder pair)
+AUDIT_JOB_STALE = int(os.getenv("AUDIT_JOB_STALE", str(2 * 60 * 60)))
+
+UPLOAD_NAME = "feedback.zip"
+
+_executor = None
+
+
+def upload_path(job_id):
+    return os.path.join(job_dir(job_id), UPLOAD_NAME)
+
+
+def output_dir(job_id):
+    return os.path.join(job_dir(job_id), "output")
+
+
+def _publish(job_id, event, state, last=False):
+    broadcast(json.dumps({"event": event, **state}), job_id, last=last)
+
+
+# ------------------------------------------------------------
+# JOB RUNNER
+# ------------------------------------------------------------
+def _run_job(job_id, incremental, store, formats, period):
+    state = update_job(job_id, status="running", started_at=time.time())
+    _publish(job_id, "started", state)
+
+    try:
+        with open(upload_path(job_id), "rb") as f:
+            archive = FeedbackArchive(f)
+            try:
+                update_job(job_id, total=len(archive.folder_pairs()))
+                done = 0
+
+                def progress(tracking_number):
+                    nonlocal done
+                    done += 1
+                    state = update_job(job_id, done=done)
+                    _publish(job_id, "progress", {**state, "tracking_number": tracking_number})
+
+                excel_path, export_paths = run_audit(
+                    archive.iter_folder_pairs(), incremental, store, formats,
+                    output_dir(job_id), progress=progress,
+                    period=period or archive.period(),
+                )
+            finally:
+                archive.close()
+
+        os.remove(upload_path(job_id))
+
+        state = update_job(
+            job_id,
+            status="finished",
+            finished_at=time.time(),
+            report=os.path.basename(excel_path),
+            exports=[os.path.basename(p) for p in export_paths],
+        )
+        _publish(job_id, "finished", state, last=True)
+
+    except Exception as e:
+        state = update_job(job_id, status="failed", finished_at=time.time(), error=str(e))
+        _publish(job_id, "failed", state, last=True)
+
+
+def submit_job(job_id, incremental=False, store=None, formats=(), period=None):
+    """
+    Queues an audit of the job's uploaded archive on a background worker.
+    Its analytics records are filed under period ("YYYY-MM"), by default
+    the archive's own feedback month.
+    The job runs in its own workspace (AUDIT_JOBS_DIR/<job_id>), so
+    concurrent audits never share files.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=AUDIT_JOB_WORKERS, thread_name_prefix="audit-job")
+
+    prune_jobs()
+    _executor.submit(_run_job, job_id, incremental, store, list(formats), period)
+
+
+def discard_job(job_id):
+    forget_job(job_id)
+    shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+def _owner_gone(owner):
+    # True when owner ("<host>:<pid>") was a process of this host that is
+    # no longer running. At startup nothing belongs to this process yet,
+    # so a job owned by our own pid is a previous process's.
+    host, _, pid = (owner or "").rpartition(":")
+    this_host, _, this_pid = job_owner().rpartition(":")
+    if host != this_host or not pid.isdigit():
+        return False
+    if pid == this_pid:
+        return True
+    if os.name == "nt":
+        return False        # no cheap liveness check; AUDIT_JOB_STALE applies
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass                # running under another user
+    return False
+
+
+def recover_jobs(stale=AUDIT_JOB_STALE):
+    """
+    Marks jobs left queued or running by a process that is gone (e.g.
+    before a restart) as failed, so their subscribers are told and
+    prune_jobs removes them in time. Run at startup.
+
+    Jobs of this host are checked by process id; jobs of other hosts are
+    lost once they have not been updated for `stale` seconds.
+    """
+    if not os.path.isdir(AUDIT_JOBS_DIR):
+        return
+
+    cutoff = time.time() - stale
+    for job_id in os.listdir(AUDIT_JOBS_DIR):
+        state = get_state(job_id)
+        if not state or state.get("status") not in ("queued", "running"):
+            continue
+        updated_at = state.get("updated_at", state.get("created_at", 0))
+        if _owner_gone(state.get("owner")) or updated_at < cutoff:
+            # The whole state: this process has no copy of the job to update
+            failed = dict(
+                state, job_id=job_id, status="failed", finished_at=time.time(),
+                error="Interrupted: the server stopped before the audit finished",
+            )
+            update_job(**failed)
+            forget_job(job_id)
+
+
+def prune_jobs(ttl=AUDIT_JOB_TTL):
+    """
+    Removes workspaces of jobs that finished or failed more than ttl seconds ago.
+    """
+    if not os.path.isdir(AUDIT_JOBS_DIR):
+        return
+
+    cutoff = time.time() - ttl
+    for job_id in os.listdir(AUDIT_JOBS_DIR):
+        state = get_state(job_id)
+        if state and state.get("status") in ("finished", "failed") and state["finished_at"] < cutoff:
+            discard_job(job_id)
@@ -0,0 +1,123 @@
+import os
+
+from app.audit.audit_analytics import AuditRecords
+from app.audit.audit_excel_writer import RowSpool, write_excel_summary
+from app.audit.audit_executor import iter_folder_pair_results
+from app.audit.audit_exports import write_audit_exports
+from app.audit.audit_store import DEFAULT_STORE, iter_incremental
+from app.core.logging_config import setup_logging
+
+logger = setup_logging()
+
+# Keep per-diff analytics records (audit_analytics) for every run
+AUDIT_ANALYTICS = os.getenv("AUDIT_ANALYTICS", "1") != "0"
+
+# ------------------------------------------------------------
+# LAZY AUDIT PIPELINE
+#
+#   folder pairs → (tracking, diffs, unmatched) → rows → Excel / exports
+#
+# Every stage is a generator, so only one folder pair's documents and
+# diffs are in memory at a time. Run it from one thread (run_in_threadpool):
+# the incremental store's SQLite connection lives in that thread.
+# ------------------------------------------------------------
+
+
+def iter_audit_results(pairs, incremental=False, store=DEFAULT_STORE, max_workers=None, progress=None):
+    """
+    Yields (tracking_number, diffs, unmatched) for every folder pair, in order.
+    """
+    if incremental:
+        yield from iter_incremental(pairs, store, max_workers, progress)
+        return
+
+    for tracking_number, diffs, unmatched in iter_folder_pair_results(pairs, max_workers):
+        if progress:
+            progress(tracking_number)
+        yield tracking_number, diffs, unmatched
+
+
+def audit_row(d):
+    # Plain text only — no rich text, no runs
+    return {
+        "tracking_number": d.get("tracking_number"),
+        "patient": d.get("patient"),
+        "typist": d.get("typist"),
+        "typed": d.get("typed") or d.get("T") or "",
+        "dictated": d.get("dictated") or d.get("D") or "",
+    }
+
+
+def iter_audit_rows(results, unmatched, make_row=audit_row):
+    """
+    Yields one summary row per diff. Unmatched files are appended to the
+    `unmatched` list as their folder pair goes by.
+    """
+    for tracking_number, diffs, unmatched_files in results:
+        unmatched.extend(unmatched_files)
+        for d in diffs:
+            yield make_row(d)
+
+
+def write_audit_reports(rows, unmatched, formats=(), output_dir="output", spool=None):
+    """
+    Writes the Excel summary, plus any export formats next to it, from a
+    row generator. Returns (excel_path, export_paths).
+
+    Rows are spooled to disk first when they are needed more than once:
+    for export formats, or when the caller passes a RowSpool to read the
+    rows back afterwards (e.g. for the HTTP response).
+    """
+    if spool is None and not formats:
+        return write_excel_summary(rows, unmatched, output_dir), []
+
+    own_spool = spool is None
+    if own_spool:
+        spool = RowSpool()
+    try:
+        spool.extend(rows)
+        excel_path = write_excel_summary(spool, unmatched, output_dir)
+        export_paths = write_audit_exports(
+            spool, unmatched, formats, os.path.splitext(excel_path)[0]
+        )
+    finally:
+        if own_spool:
+            spool.close()
+
+    return excel_path, export_paths
+
+
+def run_audit(pairs, incremental=False, store=DEFAULT_STORE, formats=(), output_dir="output",
+              make_row=audit_row, spool=None, progress=None, unmatched=None, period=None):
+    """
+    The whole audit, folder pairs to report files, in one streaming pass.
+    Returns (excel_path, export_paths); pass a list as `unmatched` to get
+    the unmatched files back too.
+
+    The diffs are also recorded for analytics under `period`, the
+    feedback month ("YYYY-MM", see FeedbackArchive.period); nothing is
+    recorded without one. Analytics never fail the audit itself.
+    """
+    if unmatched is None:
+        unmatched = []
+    results = iter_audit_results(pairs, incremental, store, progress=progress)
+
+    records = None
+    if AUDIT_ANALYTICS and period:
+        records = AuditRecords(period)
+        results = records.record(results)
+
+    rows = iter_audit_rows(results, unmatched, make_row)
+    try:
+        reports = write_audit_reports(rows, unmatched, formats, output_dir, spool)
+    except Exception:
+        if records is not None:
+            records.discard()
+        raise
+
+    if records is not None:
+        try:
+            records.save()
+        except Exception:
+            logger.exception(f"Could not save audit analytics for {period}")
+    return reports
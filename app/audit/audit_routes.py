@@ -1,17 +1,31 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 import subprocess
+import threading
+import queue
+import json
 import os
-import zipfile
-import shutil
 
-from .audit_engine import process_folder_pair, extract_tracking_number, write_excel_summary
+from .audit_analytics import parse_period
+from .audit_excel_writer import RowSpool
+from .audit_exports import MEDIA_TYPES, parse_export_formats
+from .audit_input import FeedbackArchive
+from .audit_pipeline import run_audit as run_audit_pipeline
+from .audit_store import DEFAULT_STORE, is_valid_store_name
+from app.services.uploads import spool_upload
 
 router = APIRouter()
 
 AUDIT_DIR = r"D:\AuditEngine\Monthly"
 AUDIT_ENGINE = r"D:\clinote-app\app\audit\audit_engine.py"
 
+# Excel and export files of the web workflow, served by /report/{filename}
+WEB_OUTPUT_DIR = os.getenv("AUDIT_WEB_OUTPUT_DIR", "output")
+
+STREAM_BUFFER_RECORDS = 1000    # rows buffered ahead of a slow client
+STREAM_POLL_SECONDS = 1.0       # how often an idle stream checks for a disconnect
+
 
 # ------------------------------------------------------------
 # OLD DESKTOP WORKFLOW (unchanged)
@@ -34,14 +48,21 @@ def list_reports():
 
 @router.get("/report/{filename}")
 def download_report(filename: str):
-    path = os.path.join(AUDIT_DIR, filename)
+    if filename != os.path.basename(filename) or filename in ("", ".", ".."):
+        raise HTTPException(status_code=404, detail="Report not found")
 
-    if not os.path.exists(path):
+    # Web audit reports first, then the desktop workflow's folder
+    for folder in (WEB_OUTPUT_DIR, AUDIT_DIR):
+        path = os.path.join(folder, filename)
+        if os.path.isfile(path):
+            break
+    else:
         raise HTTPException(status_code=404, detail="Report not found")
 
+    extension = os.path.splitext(filename)[1].lstrip(".").lower()
     return FileResponse(
         path,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        media_type=MEDIA_TYPES.get(extension, "application/octet-stream"),
         filename=filename
     )
 
@@ -50,68 +71,209 @@ def download_report(filename: str):
 # NEW WEB WORKFLOW (ZIP → JSON + Excel)
 # ------------------------------------------------------------
 @router.post("/run-audit")
-async def run_audit_zip(feedback_zip: UploadFile = File(...)):
-    temp_root = "temp_feedback"
-    if os.path.exists(temp_root):
-        shutil.rmtree(temp_root)
-    os.makedirs(temp_root, exist_ok=True)
-
-    zip_path = os.path.join(temp_root, feedback_zip.filename)
-
-    # Save uploaded ZIP
-    with open(zip_path, "wb") as f:
-        f.write(await feedback_zip.read())
-
-    # Unzip
-    with zipfile.ZipFile(zip_path, "r") as z:
-        z.extractall(temp_root)
-
-    # Locate folder containing 0xxxx / 1xxxx pairs
-    feedback_root = None
-    for root, dirs, files in os.walk(temp_root):
-        if any(d.startswith("0") or d.startswith("1") for d in dirs):
-            feedback_root = root
-            break
+async def run_audit_zip(
+    feedback_zip: UploadFile = File(...),
+    incremental: bool = Form(False),
+    store: str = Form(DEFAULT_STORE),
+    formats: str = Form(""),
+    period: str = Form(""),
+):
+    try:
+        export_formats = parse_export_formats(formats)
+        period = parse_period(period)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
 
-    if not feedback_root:
-        return JSONResponse({"error": "No 0/1 folders found in ZIP"}, status_code=400)
+    if incremental and not is_valid_store_name(store):
+        return JSONResponse({"error": f"Invalid audit store name: {store}"}, status_code=400)
 
-    folders = [f for f in os.listdir(feedback_root) if os.path.isdir(os.path.join(feedback_root, f))]
-    mt_folders = [f for f in folders if f.startswith("1")]
-    ed_folders = [f for f in folders if f.startswith("0")]
+    # Spool the upload in chunks; the ZIP is indexed, never extracted
+    spool = await spool_upload(feedback_zip)
+    archive = FeedbackArchive(spool)
+    try:
+        if archive.feedback_root is None:
+            return JSONResponse({"error": "No 0/1 folders found in ZIP"}, status_code=400)
 
-    all_rows = []
-    unmatched = []
+        # Fan folder pairs out across worker processes, off the event loop.
+        # Rows stream into the Excel/export writers and a disk spool that
+        # the response is read back from. Incremental runs only process
+        # new or changed tracking numbers.
+        rows = RowSpool()
+        try:
+            excel_path, export_paths = await run_in_threadpool(
+                run_audit_pipeline, archive.iter_folder_pairs(), incremental, store,
+                export_formats, WEB_OUTPUT_DIR, _web_row, rows,
+                period=period or archive.period(),
+            )
+        except Exception:
+            rows.close()
+            raise
+    finally:
+        archive.close()
+        spool.close()
 
-    for ed in ed_folders:
-        core = ed[1:]
-        mt = "1" + core
+    tail = {
+        "excel_url": f"/report/{os.path.basename(excel_path)}",
+        "export_urls": [f"/report/{os.path.basename(p)}" for p in export_paths],
+    }
+    return StreamingResponse(_stream_rows_json(rows, tail), media_type="application/json")
 
-        mt_path = os.path.join(feedback_root, mt)
-        ed_path = os.path.join(feedback_root, ed)
 
-        if not os.path.isdir(mt_path):
-            continue
+def _web_row(d):
+    return {
+        "tracking_number": d["tracking_number"],
+        "patient": d["patient"],
+        "typist": "PM",
+        "typed": f"Typed: {d['typed']}",
+        "dictated": f"Dictated: {d['dictated']}",
+    }
 
-        diffs, unmatched_files = process_folder_pair(
-            mt_path, ed_path, extract_tracking_number(ed)
-        )
 
-        for d in diffs:
-            all_rows.append({
-                "tracking_number": d["tracking_number"],
-                "patient": d["patient"],
-                "typist": "PM",
-                "typed": f"Typed: {d['T']}",
-                "dictated": f"Dictated: {d['D']}",
-            })
+def _json(value):
+    # Same encoding as JSONResponse
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
 
-        unmatched.extend(unmatched_files)
 
-    # Write Excel summary
-    excel_path = write_excel_summary(all_rows, unmatched)
+def _stream_rows_json(rows, tail):
+    """
+    {"rows": [...], **tail}, read row by row from the spool.
+    """
+    try:
+        yield '{"rows":['
+        for i, row in enumerate(rows):
+            yield ("," if i else "") + _json(row)
+        yield "]"
+        for key, value in tail.items():
+            yield f",{_json(key)}:{_json(value)}"
+        yield "}"
+    finally:
+        rows.close()
 
-    return {
-        "rows": all_rows,
-        "excel_url": f"/report/{os.path.basename(excel_path)}"
-    }
\ No newline at end of file
+
+# ------------------------------------------------------------
+# WEB WORKFLOW, STREAMED (ZIP → NDJSON rows as folders complete)
+# ------------------------------------------------------------
+class _StreamClosed(Exception):
+    pass
+
+
+class _NdjsonChannel:
+    """
+    Hands records from the audit thread to the response, one NDJSON line
+    each. The buffer is bounded, so a slow client slows the audit down
+    instead of piling rows up in memory; a client that goes away stops it.
+    While no record is ready the response checks for a disconnect every
+    STREAM_POLL_SECONDS, so a long folder pair cannot hide one.
+    """
+
+    def __init__(self, max_records=STREAM_BUFFER_RECORDS):
+        self.queue = queue.Queue(maxsize=max_records)
+        self.closed = threading.Event()
+
+    def send(self, record):
+        while not self.closed.is_set():
+            try:
+                self.queue.put(record, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _StreamClosed()
+
+    async def stream(self, request):
+        try:
+            while True:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    if await request.is_disconnected():
+                        return
+                    try:
+                        record = await run_in_threadpool(self.queue.get, timeout=STREAM_POLL_SECONDS)
+                    except queue.Empty:
+                        continue
+                if record is None:
+                    return
+                yield _json(record) + "\n"
+        finally:
+            self.closed.set()
+
+
+@router.post("/run-audit/stream")
+async def run_audit_zip_stream(
+    request: Request,
+    feedback_zip: UploadFile = File(...),
+    incremental: bool = Form(False),
+    store: str = Form(DEFAULT_STORE),
+    formats: str = Form(""),
+    period: str = Form(""),
+):
+    """
+    Same audit as /run-audit, as newline-delimited JSON:
+
+        {"type": "row", "tracking_number": ..., "patient": ..., ...}
+        ...
+        {"type": "summary", "rows": N, "unmatched": [...], "excel_url": ..., "export_urls": [...]}
+
+    Rows are sent as each folder pair completes. A failed audit ends with
+    {"type": "error", "error": ...} instead of the summary.
+    """
+    try:
+        export_formats = parse_export_formats(formats)
+        period = parse_period(period)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if incremental and not is_valid_store_name(store):
+        return JSONResponse({"error": f"Invalid audit store name: {store}"}, status_code=400)
+
+    spool = await spool_upload(feedback_zip)
+    archive = FeedbackArchive(spool)
+    if archive.feedback_root is None:
+        archive.close()
+        spool.close()
+        return JSONResponse({"error": "No 0/1 folders found in ZIP"}, status_code=400)
+
+    channel = _NdjsonChannel()
+
+    def produce():
+        unmatched = []
+        rows = 0
+
+        def stream_row(d):
+            # Every row goes to the client as well as the report files
+            nonlocal rows
+            row = _web_row(d)
+            channel.send({"type": "row", **row})
+            rows += 1
+            return row
+
+        try:
+            excel_path, export_paths = run_audit_pipeline(
+                archive.iter_folder_pairs(), incremental, store, export_formats,
+                WEB_OUTPUT_DIR, stream_row, unmatched=unmatched,
+                period=period or archive.period(),
+            )
+            channel.send({
+                "type": "summary",
+                "rows": rows,
+                "unmatched": unmatched,
+                "excel_url": f"/report/{os.path.basename(excel_path)}",
+                "export_urls": [f"/report/{os.path.basename(p)}" for p in export_paths],
+            })
+            channel.send(None)
+        except _StreamClosed:
+            pass
+        except Exception as e:
+            try:
+                channel.send({"type": "error", "error": str(e)})
+                channel.send(None)
+            except _StreamClosed:
+                pass
+        finally:
+            archive.close()
+            spool.close()
+
+    # The audit runs on its own thread for as long as the response streams
+    threading.Thread(target=produce, name="audit-stream", daemon=True).start()
+
+    return StreamingResponse(channel.stream(request), media_type="application/x-ndjson")
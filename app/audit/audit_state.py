@@ -1,5 +1,10 @@
 import time
 import os
+import re
+import json
+import socket
+import uuid
+import threading
 
 AUDIT_STATE = {
     "status": "idle",          # idle | running | finished
@@ -10,6 +15,12 @@ AUDIT_STATE = {
 
 AUDIT_DIR = r"D:\AuditEngine\Monthly"
 
+# One workspace per audit job: upload, state.json and output/
+AUDIT_JOBS_DIR = os.getenv("AUDIT_JOBS_DIR", "audit_jobs")
+
+JOBS = {}                      # job id -> job state (this process)
+_jobs_lock = threading.Lock()
+
 
 def set_running():
     AUDIT_STATE["status"] = "running"
@@ -23,5 +34,84 @@ def set_finished(report_filename):
     AUDIT_STATE["latest_report"] = report_filename
 
 
-def get_state():
-    return AUDIT_STATE
\ No newline at end of file
+def get_state(job_id=None):
+    """
+    Desktop workflow state, or the state of one audit job (None if unknown).
+    Jobs started by another instance are read from their shared workspace.
+    """
+    if job_id is None:
+        return AUDIT_STATE
+
+    with _jobs_lock:
+        if job_id in JOBS:
+            return dict(JOBS[job_id])
+
+    try:
+        with open(os.path.join(job_dir(job_id), "state.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# ------------------------------------------------------------
+# AUDIT JOBS
+# ------------------------------------------------------------
+def is_valid_job_id(job_id):
+    return bool(re.fullmatch(r"[0-9a-f]{32}", job_id or ""))
+
+
+def job_dir(job_id):
+    return os.path.join(AUDIT_JOBS_DIR, job_id)
+
+
+def job_owner():
+    # The process running this instance's jobs, as "<host>:<pid>"
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def is_local_job(job_id):
+    with _jobs_lock:
+        return job_id in JOBS
+
+
+def create_job():
+    job_id = uuid.uuid4().hex
+    os.makedirs(job_dir(job_id))
+    with _jobs_lock:
+        JOBS[job_id] = {"job_id": job_id}
+    update_job(
+        job_id,
+        status="queued",          # queued | running | finished | failed
+        owner=job_owner(),
+        created_at=time.time(),
+        started_at=None,
+        finished_at=None,
+        total=None,
+        done=0,
+        report=None,
+        exports=[],
+        error=None,
+    )
+    return job_id
+
+
+def update_job(job_id, **fields):
+    """
+    Updates a job's state and writes it to the job workspace. Returns a copy.
+    """
+    with _jobs_lock:
+        state = JOBS.setdefault(job_id, {})
+        state.update(fields, updated_at=time.time())
+        state = dict(state)
+
+        path = os.path.join(job_dir(job_id), "state.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    return state
+
+
+def forget_job(job_id):
+    with _jobs_lock:
+        JOBS.pop(job_id, None)
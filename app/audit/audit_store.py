@@ -0,0 +1,235 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from collections import Counter, deque
+
+from app.audit.audit_cache import DIFF_VERSION, TEXT_VERSION
+from app.audit.audit_engine import folder_documents
+from app.audit.audit_executor import iter_folder_pair_results
+from app.audit.filename_pairing import PAIRING_VERSION
+from app.audit.word_diff import WORD_DIFF_BACKEND
+from app.core.hashing import document_hash
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+AUDIT_STORE_DIR = os.getenv("AUDIT_STORE_DIR", "audit_store")
+DEFAULT_STORE = "default"
+
+# Bump when the stored diff fields change, so older results are recomputed
+STORE_VERSION = "2"
+
+
+def is_valid_store_name(name):
+    return bool(re.fullmatch(r"[A-Za-z0-9_-][A-Za-z0-9_.-]*", name or ""))
+
+
+def folder_pair_fingerprint(mt_folder, ed_folder):
+    """
+    Returns (fingerprint, documents) for a folder pair, where documents is
+    [(side, filename, sha256)] and the fingerprint hashes all of them, plus
+    the extraction, pairing and diff versions the results depend on.
+    """
+    documents = []
+    for side, folder in (("MT", mt_folder), ("ED", ed_folder)):
+        for filename, source in folder_documents(folder).items():
+            documents.append((side, filename, document_hash(source)))
+
+    digest = hashlib.sha256()
+    digest.update(
+        f"text={TEXT_VERSION}\0pairing={PAIRING_VERSION}\0diff={DIFF_VERSION}:{WORD_DIFF_BACKEND}"
+        f"\0store={STORE_VERSION}\n".encode("utf-8")
+    )
+    for side, filename, doc_hash in documents:
+        digest.update(f"{side}\0{filename}\0{doc_hash}\n".encode("utf-8"))
+    return digest.hexdigest(), documents
+
+
+class AuditStore:
+    """
+    Per-tracking-number audit results in SQLite, with the content hashes of
+    the documents they were computed from:
+
+        AUDIT_STORE_DIR/<name>.sqlite3
+
+    One store per audit period (e.g. "2024-05") keeps re-runs of that month
+    incremental.
+
+    Rows are keyed by store_key: the tracking number, with "#2", "#3", ...
+    for further folder pairs of an archive that share it.
+    """
+
+    def __init__(self, name=DEFAULT_STORE, root=AUDIT_STORE_DIR):
+        if not is_valid_store_name(name):
+            raise ValueError(f"Invalid audit store name: {name!r}")
+
+        os.makedirs(root, exist_ok=True)
+        self.path = os.path.join(root, f"{name}.sqlite3")
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS folders (
+                tracking_number TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS documents (
+                tracking_number TEXT NOT NULL,
+                side TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                sha256 TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS diffs (
+                tracking_number TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                filename TEXT,
+                patient TEXT,
+                typist TEXT,
+                typed TEXT,
+                dictated TEXT
+            );
+            CREATE TABLE IF NOT EXISTS unmatched (
+                tracking_number TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                folder TEXT,
+                filename TEXT
+            );
+            CREATE INDEX IF NOT EXISTS documents_tracking ON documents (tracking_number);
+            CREATE INDEX IF NOT EXISTS diffs_tracking ON diffs (tracking_number, seq);
+            CREATE INDEX IF NOT EXISTS unmatched_tracking ON unmatched (tracking_number, seq);
+            """
+        )
+        # Stores created before diffs kept the MT filename
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(diffs)")]
+        if "filename" not in columns:
+            self.conn.execute("ALTER TABLE diffs ADD COLUMN filename TEXT")
+
+    def fingerprint(self, tracking_number):
+        row = self.conn.execute(
+            "SELECT fingerprint FROM folders WHERE tracking_number = ?", (tracking_number,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def save_folder(self, tracking_number, fingerprint, documents, diffs, unmatched):
+        """
+        Replaces everything stored for one tracking number, atomically.
+        """
+        self.conn.execute("BEGIN")
+        try:
+            for table in ("folders", "documents", "diffs", "unmatched"):
+                self.conn.execute(f"DELETE FROM {table} WHERE tracking_number = ?", (tracking_number,))
+
+            self.conn.execute(
+                "INSERT INTO folders (tracking_number, fingerprint, updated_at) VALUES (?, ?, ?)",
+                (tracking_number, fingerprint, time.time()),
+            )
+            self.conn.executemany(
+                "INSERT INTO documents (tracking_number, side, filename, sha256) VALUES (?, ?, ?, ?)",
+                [(tracking_number, side, filename, h) for side, filename, h in documents],
+            )
+            self.conn.executemany(
+                "INSERT INTO diffs (tracking_number, seq, filename, patient, typist, typed, dictated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (tracking_number, i, d.get("filename"), d.get("patient"), d.get("typist"),
+                     d.get("typed"), d.get("dictated"))
+                    for i, d in enumerate(diffs)
+                ],
+            )
+            self.conn.executemany(
+                "INSERT INTO unmatched (tracking_number, seq, folder, filename) VALUES (?, ?, ?, ?)",
+                [
+                    (tracking_number, i, u.get("folder"), u.get("filename"))
+                    for i, u in enumerate(unmatched)
+                ],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def load_folder(self, key, tracking_number=None):
+        tracking_number = tracking_number or key
+        diffs = [
+            {
+                "tracking_number": tracking_number,
+                "filename": filename,
+                "patient": patient,
+                "typist": typist,
+                "typed": typed,
+                "dictated": dictated,
+            }
+            for filename, patient, typist, typed, dictated in self.conn.execute(
+                "SELECT filename, patient, typist, typed, dictated FROM diffs WHERE tracking_number = ? ORDER BY seq",
+                (key,),
+            )
+        ]
+        unmatched = [
+            {"tracking_number": tracking_number, "folder": folder, "filename": filename}
+            for folder, filename in self.conn.execute(
+                "SELECT folder, filename FROM unmatched WHERE tracking_number = ? ORDER BY seq",
+                (key,),
+            )
+        ]
+        return diffs, unmatched
+
+    def close(self):
+        self.conn.close()
+
+
+def store_key(tracking_number, occurrence):
+    # The n-th folder pair with this tracking number in one archive
+    return tracking_number if occurrence == 1 else f"{tracking_number}#{occurrence}"
+
+
+def iter_incremental(pairs, store_name=DEFAULT_STORE, max_workers=None, progress=None):
+    """
+    Incremental audit: only folder pairs that are new, or whose documents
+    changed since the last run into the named store, are processed; the
+    others are read back from the store.
+
+    Yields (tracking_number, diffs, unmatched) in the order of `pairs`, each
+    as soon as it and the pairs before it are done. Blocking — iterate it
+    from one thread; the SQLite connection lives in that thread.
+    progress(tracking_number) is called as each pair is processed or reused.
+    """
+    store = AuditStore(store_name)
+    occurrences = Counter()
+    to_save = deque()      # per pair, in order: (key, fingerprint, documents), or None if reused
+
+    def reuse(pair):
+        tracking_number, mt_folder, ed_folder = pair
+        occurrences[tracking_number] += 1
+        key = store_key(tracking_number, occurrences[tracking_number])
+        fingerprint, documents = folder_pair_fingerprint(mt_folder, ed_folder)
+        if store.fingerprint(key) == fingerprint:
+            to_save.append(None)
+            return store.load_folder(key, tracking_number)
+        to_save.append((key, fingerprint, documents))
+        return None
+
+    try:
+        for tracking_number, diffs, unmatched in iter_folder_pair_results(pairs, max_workers, reuse):
+            save = to_save.popleft()
+            if save is not None:
+                store.save_folder(*save, diffs, unmatched)
+            if progress:
+                progress(tracking_number)
+            yield tracking_number, diffs, unmatched
+    finally:
+        store.close()
+
+
+def run_incremental(pairs, store_name=DEFAULT_STORE, max_workers=None, progress=None):
+    """
+    Like iter_incremental, merged into (all_diffs, unmatched).
+    """
+    all_diffs = []
+    unmatched = []
+    for tracking_number, diffs, unmatched_files in iter_incremental(pairs, store_name, max_workers, progress):
+        all_diffs.extend(diffs)
+        unmatched.extend(unmatched_files)
+    return all_diffs, unmatched
@@ -0,0 +1,97 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+SOFFICE_BINARY = os.getenv("SOFFICE_BINARY", "soffice")
+SOFFICE_BATCH_SIZE = int(os.getenv("SOFFICE_BATCH_SIZE", "50"))     # files per soffice call
+SOFFICE_PARALLEL = int(os.getenv("SOFFICE_PARALLEL", "2"))          # soffice calls at once
+SOFFICE_TIMEOUT = int(os.getenv("SOFFICE_TIMEOUT", "300"))          # seconds per call
+
+
+def soffice_available():
+    return shutil.which(SOFFICE_BINARY) is not None
+
+
+def _convert_batch(batch):
+    """
+    One headless soffice call for a batch of (key, source) pairs, with its
+    own user profile so several calls can run side by side. Inputs are
+    staged under index names, so duplicate basenames cannot collide.
+    """
+    converted = {}
+
+    with tempfile.TemporaryDirectory(prefix="audit_soffice_") as work_dir:
+        profile_dir = os.path.join(work_dir, "profile")
+        input_dir = os.path.join(work_dir, "input")
+        output_dir = os.path.join(work_dir, "output")
+        os.makedirs(input_dir)
+        os.makedirs(output_dir)
+
+        staged = {}
+        for i, (key, source) in enumerate(batch):
+            staged_path = os.path.join(input_dir, f"{i:05d}.doc")
+            if isinstance(source, bytes):
+                with open(staged_path, "wb") as f:
+                    f.write(source)
+            else:
+                shutil.copyfile(source, staged_path)
+            staged[key] = os.path.join(output_dir, f"{i:05d}.docx")
+
+        cmd = [
+            SOFFICE_BINARY,
+            f"-env:UserInstallation={Path(profile_dir).as_uri()}",
+            "--headless",
+            "--norestore",
+            "--convert-to",
+            "docx",
+            "--outdir",
+            output_dir,
+            *sorted(os.path.join(input_dir, f) for f in os.listdir(input_dir)),
+        ]
+        try:
+            subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=SOFFICE_TIMEOUT,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return converted
+
+        # soffice exits 0 even when single files fail; trust the outputs
+        for key, output_path in staged.items():
+            if os.path.exists(output_path):
+                with open(output_path, "rb") as f:
+                    converted[key] = f.read()
+
+    return converted
+
+
+def convert_docs_to_docx(documents, batch_size=None, parallel=None):
+    """
+    Converts {key: path or bytes} legacy .doc files to .docx with a few
+    batched LibreOffice calls. Returns {key: docx bytes} for the files that
+    converted; failed files are simply missing from the result.
+
+    Pass the .doc files of one folder pair, or of a whole archive (keys
+    only need to be unique, e.g. (tracking_number, filename)).
+    """
+    items = list(documents.items())
+    if not items:
+        return {}
+
+    batch_size = batch_size or SOFFICE_BATCH_SIZE
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+    converted = {}
+    workers = min(parallel or SOFFICE_PARALLEL, len(batches))
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for result in pool.map(_convert_batch, batches):
+            converted.update(result)
+    return converted
@@ -0,0 +1,437 @@
+import bisect
+import struct
+
+
+# ------------------------------------------------------------
+# OLE2 / COMPOUND FILE CONSTANTS
+# ------------------------------------------------------------
+CFB_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+ENDOFCHAIN = 0xFFFFFFFE
+FREESECT = 0xFFFFFFFF
+NOSTREAM = 0xFFFFFFFF
+
+STREAM_OBJECT = 2
+
+# ------------------------------------------------------------
+# WORD 97-2003 (MS-DOC) CONSTANTS
+# ------------------------------------------------------------
+WORD_IDENT = 0xA5EC
+MIN_NFIB = 0x00C0           # Word 97 and later; Word 6/95 use another FIB layout
+F_ENCRYPTED = 0x0100
+F_WHICH_TBL_STM = 0x0200
+
+# Indexes into FibRgFcLcb97
+FC_PLCF_SED = 6
+FC_PLCF_BTE_PAPX = 13
+FC_CLX = 33
+
+SPRM_P_F_IN_TABLE = 0x2416
+SPRM_P_ITAP = 0x6649
+SPRM_T_DEF_TABLE = 0xD608
+SPRM_P_CHG_TABS = 0xC615
+SPRM_OPERAND_SIZE = {0: 1, 1: 1, 2: 2, 3: 4, 4: 2, 5: 2, 7: 3}
+
+FKP_SIZE = 512
+
+# Characters that end a paragraph in the text stream
+PARAGRAPH_MARK = "\r"
+CELL_MARK = "\x07"
+SECTION_MARK = "\x0c"
+
+FIELD_BEGIN = "\x13"
+FIELD_SEPARATOR = "\x14"
+FIELD_END = "\x15"
+
+# Special characters, translated the way python-docx reads the converted
+# .docx (manual line break -> "\n", non-breaking hyphen -> "-", ...).
+SPECIAL_CHARS = {
+    "\t": "\t",
+    "\x0b": "\n",
+    "\x1e": "-",
+}
+
+
+class DocFormatError(ValueError):
+    pass
+
+
+def _u16(data, offset):
+    return struct.unpack_from("<H", data, offset)[0]
+
+
+def _u32(data, offset):
+    return struct.unpack_from("<I", data, offset)[0]
+
+
+# ------------------------------------------------------------
+# COMPOUND FILE READER
+# ------------------------------------------------------------
+class CompoundFile:
+    """
+    Minimal read-only OLE2 compound file reader: enough to get the
+    top-level streams of a .doc out of its FAT / MiniFAT chains.
+    """
+
+    def __init__(self, data):
+        if len(data) < 512 or data[:8] != CFB_SIGNATURE:
+            raise DocFormatError("Not an OLE2 compound file")
+
+        self.data = data
+        self.sector_size = 1 << _u16(data, 0x1E)
+        self.mini_sector_size = 1 << _u16(data, 0x20)
+        self.mini_cutoff = _u32(data, 0x38)
+
+        num_fat_sectors = _u32(data, 0x2C)
+        first_dir_sector = _u32(data, 0x30)
+        first_minifat_sector = _u32(data, 0x3C)
+        first_difat_sector = _u32(data, 0x44)
+        num_difat_sectors = _u32(data, 0x48)
+
+        # DIFAT: 109 entries in the header, then chained DIFAT sectors
+        difat = list(struct.unpack_from("<109I", data, 0x4C))
+        per_sector = self.sector_size // 4
+        sector = first_difat_sector
+        seen = set()
+        # The header count is untrusted: no more sectors than the file holds
+        for _ in range(min(num_difat_sectors, len(data) // self.sector_size)):
+            if sector in (ENDOFCHAIN, FREESECT):
+                break
+            if sector in seen:
+                raise DocFormatError("DIFAT chain loops")
+            seen.add(sector)
+            entries = struct.unpack_from(f"<{per_sector}I", self._sector(sector))
+            difat.extend(entries[:-1])
+            sector = entries[-1]
+
+        fat_sectors = [s for s in difat[:num_fat_sectors] if s not in (ENDOFCHAIN, FREESECT)]
+        self.fat = self._uint32_array(b"".join(self._sector(s) for s in fat_sectors))
+
+        self.entries = self._read_directory(self._chain_bytes(first_dir_sector, self.fat))
+        if not self.entries:
+            raise DocFormatError("Empty compound file directory")
+
+        root = self.entries[0]
+        self.mini_stream = self._chain_bytes(root["start"], self.fat)[:root["size"]]
+        self.minifat = self._uint32_array(self._chain_bytes(first_minifat_sector, self.fat))
+
+    @staticmethod
+    def _uint32_array(raw):
+        count = len(raw) // 4
+        return struct.unpack_from(f"<{count}I", raw) if count else ()
+
+    def _sector(self, sector):
+        offset = (sector + 1) * self.sector_size
+        chunk = self.data[offset:offset + self.sector_size]
+        if len(chunk) < self.sector_size:
+            raise DocFormatError(f"Sector {sector} out of range")
+        return chunk
+
+    def _chain(self, start, table):
+        chain = []
+        sector = start
+        while sector not in (ENDOFCHAIN, FREESECT):
+            if sector >= len(table) or len(chain) > len(table):
+                raise DocFormatError("Broken sector chain")
+            chain.append(sector)
+            sector = table[sector]
+        return chain
+
+    def _chain_bytes(self, start, table):
+        return b"".join(self._sector(s) for s in self._chain(start, table))
+
+    def _read_directory(self, raw):
+        entries = []
+        for offset in range(0, len(raw) - 127, 128):
+            name_length = _u16(raw, offset + 64)
+            size = struct.unpack_from("<Q", raw, offset + 120)[0]
+            if self.sector_size == 512:
+                size &= 0xFFFFFFFF      # v3 files may leave the high half dirty
+            entries.append({
+                "name": raw[offset:offset + max(name_length - 2, 0)].decode("utf-16-le", "replace"),
+                "type": raw[offset + 66],
+                "left": _u32(raw, offset + 68),
+                "right": _u32(raw, offset + 72),
+                "child": _u32(raw, offset + 76),
+                "start": _u32(raw, offset + 116),
+                "size": size,
+            })
+        return entries
+
+    def root_streams(self):
+        """
+        Returns {name: entry} for the streams directly under the root storage,
+        walking the root's red-black sibling tree.
+        """
+        streams = {}
+        pending = [self.entries[0]["child"]]
+        seen = set()
+        while pending:
+            index = pending.pop()
+            if index == NOSTREAM or index in seen or index >= len(self.entries):
+                continue
+            seen.add(index)
+            entry = self.entries[index]
+            if entry["type"] == STREAM_OBJECT:
+                streams[entry["name"]] = entry
+            pending.extend((entry["left"], entry["right"]))
+        return streams
+
+    def read_stream(self, entry):
+        if entry["size"] < self.mini_cutoff:
+            chain = self._chain(entry["start"], self.minifat)
+            size = self.mini_sector_size
+            raw = b"".join(self.mini_stream[s * size:(s + 1) * size] for s in chain)
+        else:
+            raw = self._chain_bytes(entry["start"], self.fat)
+        return raw[:entry["size"]]
+
+
+# ------------------------------------------------------------
+# WORD DOCUMENT STRUCTURES
+# ------------------------------------------------------------
+def _read_fib(word):
+    if len(word) < 0x22 or _u16(word, 0) != WORD_IDENT:
+        raise DocFormatError("Missing Word FIB")
+    if _u16(word, 2) < MIN_NFIB:
+        raise DocFormatError("Pre-Word 97 document")
+
+    flags = _u16(word, 0x0A)
+    if flags & F_ENCRYPTED:
+        raise DocFormatError("Encrypted document")
+
+    # FibBase (32) | csw + FibRgW | cslw + FibRgLw | cbRgFcLcb + FibRgFcLcb
+    pos = 32
+    pos += 2 + _u16(word, pos) * 2
+    rg_lw = pos + 2
+    pos = rg_lw + _u16(word, pos) * 4
+    fc_lcb_count = _u16(word, pos)
+    rg_fc_lcb = pos + 2
+
+    def fc_lcb(index):
+        if index >= fc_lcb_count:
+            return 0, 0
+        return struct.unpack_from("<II", word, rg_fc_lcb + index * 8)
+
+    return {
+        "table": "1Table" if flags & F_WHICH_TBL_STM else "0Table",
+        "ccp_text": _u32(word, rg_lw + 3 * 4),
+        "clx": fc_lcb(FC_CLX),
+        "sed": fc_lcb(FC_PLCF_SED),
+        "bte_papx": fc_lcb(FC_PLCF_BTE_PAPX),
+    }
+
+
+def _read_pieces(table, fc, lcb):
+    """
+    Parses the Clx piece table: [(cp_start, cp_end, fc, bytes_per_char)].
+    """
+    pos, end = fc, fc + lcb
+    while pos < end:
+        kind = table[pos]
+        if kind == 1:                               # Prc: skip the grpprl
+            cb = _u16(table, pos + 1)
+            if cb == 0 or pos + 3 + cb > end:
+                raise DocFormatError("Invalid Prc in Clx")
+            pos += 3 + cb
+        elif kind == 2:                             # Pcdt: the PlcPcd
+            plc_size = _u32(table, pos + 1)
+            plc = table[pos + 5:pos + 5 + plc_size]
+            break
+        else:
+            raise DocFormatError("Invalid Clx")
+    else:
+        raise DocFormatError("Missing piece table")
+
+    count = max((len(plc) - 4) // 12, 0)
+    cps = struct.unpack_from(f"<{count + 1}I", plc)
+    pieces = []
+    for i in range(count):
+        fc_compressed = _u32(plc, (count + 1) * 4 + i * 8 + 2)
+        if fc_compressed & 0x40000000:
+            pieces.append((cps[i], cps[i + 1], (fc_compressed & 0x3FFFFFFF) // 2, 1))
+        else:
+            pieces.append((cps[i], cps[i + 1], fc_compressed & 0x3FFFFFFF, 2))
+    return pieces
+
+
+def _read_section_ends(table, fc, lcb):
+    count = (lcb - 4) // 16 if lcb >= 4 else -1
+    if count < 0:
+        return set()
+    return set(struct.unpack_from(f"<{count + 1}I", table, fc)[1:])
+
+
+def _papx_in_table(grpprl):
+    pos = 0
+    while pos + 2 <= len(grpprl):
+        sprm = _u16(grpprl, pos)
+        pos += 2
+        if sprm == SPRM_P_F_IN_TABLE:
+            return pos < len(grpprl) and grpprl[pos] != 0
+        if sprm == SPRM_P_ITAP:
+            return pos + 4 <= len(grpprl) and _u32(grpprl, pos) > 0
+
+        spra = sprm >> 13
+        if spra in SPRM_OPERAND_SIZE:
+            pos += SPRM_OPERAND_SIZE[spra]
+        elif sprm == SPRM_T_DEF_TABLE:
+            pos += 1 + _u16(grpprl, pos)
+        elif sprm == SPRM_P_CHG_TABS and grpprl[pos] == 255:
+            # Complex PChgTabs operand: deleted tabs, then added tabs
+            deleted = grpprl[pos + 1]
+            added = grpprl[pos + 2 + deleted * 4]
+            pos += 3 + deleted * 4 + added * 3
+        else:
+            pos += 1 + grpprl[pos]
+    return False
+
+
+class _ParagraphTable:
+    """
+    Answers "is the paragraph whose mark is at this FC inside a table?"
+    from the PAPX FKPs, so table cells can be skipped like python-docx
+    skips them in Document.paragraphs.
+    """
+
+    def __init__(self, word, table, fc, lcb):
+        count = max((lcb - 4) // 8, 0)
+        self.word = word
+        self.fcs = struct.unpack_from(f"<{count + 1}I", table, fc) if count else ()
+        self.pages = [
+            _u32(table, fc + (count + 1) * 4 + i * 4) & 0x3FFFFF for i in range(count)
+        ]
+        self.fkps = {}
+
+    def _fkp(self, page):
+        if page not in self.fkps:
+            raw = self.word[page * FKP_SIZE:(page + 1) * FKP_SIZE]
+            if len(raw) < FKP_SIZE:
+                raise DocFormatError("PAPX FKP out of range")
+            crun = raw[FKP_SIZE - 1]
+            self.fkps[page] = (raw, struct.unpack_from(f"<{crun + 1}I", raw), crun)
+        return self.fkps[page]
+
+    def in_table(self, fc):
+        i = bisect.bisect_right(self.fcs, fc) - 1
+        if i < 0 or i >= len(self.pages):
+            return None
+
+        raw, run_fcs, crun = self._fkp(self.pages[i])
+        run = bisect.bisect_right(run_fcs, fc) - 1
+        if run < 0 or run >= crun:
+            return None
+
+        offset = raw[(crun + 1) * 4 + run * 13] * 2
+        if not offset:
+            return False
+
+        cb = raw[offset]
+        if cb:
+            start, length = offset + 1, 2 * cb - 1
+        else:
+            start, length = offset + 2, 2 * raw[offset + 1]
+        # Skip the 2-byte istd in front of the sprms
+        return _papx_in_table(raw[start + 2:start + length])
+
+
+# ------------------------------------------------------------
+# TEXT EXTRACTION
+# ------------------------------------------------------------
+def _main_text_chars(word, pieces, ccp_text):
+    """
+    Yields (cp, char, fc) for the main document text, in CP order.
+    """
+    for cp_start, cp_end, fc, width in pieces:
+        cp_end = min(cp_end, ccp_text)
+        if cp_start >= cp_end:
+            continue
+        raw = word[fc:fc + (cp_end - cp_start) * width]
+        text = raw.decode("cp1252", "replace") if width == 1 else raw.decode("utf-16-le", "replace")
+        for offset, char in enumerate(text):
+            yield cp_start + offset, char, fc + offset * width
+
+
+def read_doc_paragraphs(data):
+    """
+    Returns the body paragraphs of a Word 97-2003 .doc, read straight from
+    the WordDocument / table streams. Paragraph boundaries and text follow
+    what read_docx_text returns for the same document saved as .docx:
+    field results are kept, field codes dropped, table cells skipped.
+
+    Raises DocFormatError for anything it cannot read natively.
+    """
+    try:
+        cfb = CompoundFile(data)
+        streams = cfb.root_streams()
+        if "WordDocument" not in streams:
+            raise DocFormatError("No WordDocument stream")
+
+        word = cfb.read_stream(streams["WordDocument"])
+        fib = _read_fib(word)
+        if fib["table"] not in streams:
+            raise DocFormatError(f"No {fib['table']} stream")
+        table = cfb.read_stream(streams[fib["table"]])
+
+        pieces = _read_pieces(table, *fib["clx"])
+        section_ends = _read_section_ends(table, *fib["sed"])
+        paragraph_table = _ParagraphTable(word, table, *fib["bte_papx"])
+
+        paragraphs = []
+        current = []
+        fields = []     # one entry per open field: True while in its code part
+
+        for cp, char, fc in _main_text_chars(word, pieces, fib["ccp_text"]):
+            if char == FIELD_BEGIN:
+                fields.append(True)
+                continue
+            if char == FIELD_SEPARATOR:
+                if fields:
+                    fields[-1] = False
+                continue
+            if char == FIELD_END:
+                if fields:
+                    fields.pop()
+                continue
+
+            is_mark = char in (PARAGRAPH_MARK, CELL_MARK) or (
+                char == SECTION_MARK and cp + 1 in section_ends
+            )
+            if is_mark:
+                in_table = paragraph_table.in_table(fc)
+                if in_table is None:
+                    in_table = char == CELL_MARK
+                if not in_table:
+                    paragraphs.append("".join(current))
+                current = []
+                continue
+
+            if any(fields):
+                continue
+            if char in SPECIAL_CHARS:
+                current.append(SPECIAL_CHARS[char])
+            elif char >= " ":
+                current.append(char)
+
+        if current:
+            paragraphs.append("".join(current))
+
+        return paragraphs
+
+    except (struct.error, IndexError) as e:
+        raise DocFormatError(f"Corrupt .doc file: {e}")
+
+
+def read_doc_text(source):
+    """
+    Returns the text of a legacy .doc (path or bytes), or None if it cannot
+    be read natively — callers then fall back to a converter.
+    """
+    try:
+        if isinstance(source, bytes):
+            data = source
+        else:
+            with open(source, "rb") as f:
+                data = f.read()
+        return "\n".join(read_doc_paragraphs(data))
+    except (OSError, DocFormatError):
+        return None
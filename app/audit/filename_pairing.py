@@ -0,0 +1,209 @@
+import difflib
+import re
+from collections import defaultdict
+
+
+FILENAME_MATCH_THRESHOLD = 0.70
+
+# Bump when normalization or matching changes, so stored results are redone
+PAIRING_VERSION = "1"
+
+DOCUMENT_EXTENSION = re.compile(r'\.docx?$', re.IGNORECASE)
+SEPARATED_DATE = re.compile(r'(?<!\d)(\d{1,2})[-./_ ](\d{1,2})[-./_ ](\d{4}|\d{2})(?!\d)')
+SEPARATED_ISO_DATE = re.compile(r'(?<!\d)((?:19|20)\d{2})[-./_ ](\d{1,2})[-./_ ](\d{1,2})(?!\d)')
+DIGIT_RUN = re.compile(r'(?<!\d)(\d{6}|\d{8})(?!\d)')
+TOKEN = re.compile(r'[a-z]+|\d+')
+
+
+# ------------------------------------------------------------
+# NORMALIZATION
+# ------------------------------------------------------------
+def _date_token(month, day, year):
+    if len(year) == 2:
+        year = "20" + year
+    if not (1 <= int(month) <= 12 and 1 <= int(day) <= 31):
+        return None
+    return f"{int(month):02d}{int(day):02d}{year}"
+
+
+def _normalize_digit_run(match):
+    digits = match.group(1)
+    if len(digits) == 6:                                   # mmddyy
+        token = _date_token(digits[:2], digits[2:4], digits[4:])
+    elif digits[:2] in ("19", "20"):                       # yyyymmdd
+        token = _date_token(digits[4:6], digits[6:], digits[:4])
+    else:                                                  # mmddyyyy
+        token = _date_token(digits[:2], digits[2:4], digits[4:])
+    return token or digits
+
+
+def normalize_filename(filename):
+    """
+    Canonical form of a patient document name, so the MT and ED copies of
+    one dictation compare equal whatever their extension, case,
+    punctuation or date layout:
+
+        "Smith, John-01-02-24.doc"  -> "smith john 01022024"
+        "SMITH_John 010224.docx"    -> "smith john 01022024"
+    """
+    name = DOCUMENT_EXTENSION.sub("", filename).lower()
+    name = SEPARATED_ISO_DATE.sub(
+        lambda m: _date_token(m.group(2), m.group(3), m.group(1)) or m.group(0), name
+    )
+    name = SEPARATED_DATE.sub(lambda m: _date_token(*m.groups()) or m.group(0), name)
+    name = DIGIT_RUN.sub(_normalize_digit_run, name)
+    return " ".join(TOKEN.findall(name))
+
+
+# ------------------------------------------------------------
+# CANDIDATES
+# ------------------------------------------------------------
+def _score(matcher, mt_name, threshold):
+    # Cheap upper bounds first; ratio() only for pairs that can pass
+    matcher.set_seq1(mt_name)
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return 0.0
+    return matcher.ratio()
+
+
+def _scored_candidates(mt_names, ed_names, threshold):
+    """
+    Returns {(mt_index, ed_index): score} for pairs at or above threshold.
+
+    Only ED names sharing a token with the MT name are scored. Tokens found
+    in most ED names (a shared first name, "report") do not make
+    candidates; an MT name with no candidates is scored against every ED.
+    """
+    index = defaultdict(list)
+    for j, name in enumerate(ed_names):
+        for token in set(name.split()):
+            index[token].append(j)
+
+    common = len(ed_names) // 2 if len(ed_names) > 4 else len(ed_names)
+    matchers = [difflib.SequenceMatcher(None, "", name) for name in ed_names]
+
+    scores = {}
+    for i, mt_name in enumerate(mt_names):
+        candidates = set()
+        for token in set(mt_name.split()):
+            postings = index.get(token, ())
+            if len(postings) <= common:
+                candidates.update(postings)
+        if not candidates:
+            candidates = range(len(ed_names))
+
+        for j in sorted(candidates):
+            score = 1.0 if mt_name == ed_names[j] else _score(matchers[j], mt_name, threshold)
+            if score >= threshold:
+                scores[(i, j)] = score
+    return scores
+
+
+# ------------------------------------------------------------
+# ASSIGNMENT
+# ------------------------------------------------------------
+def _min_cost_assignment(cost):
+    """
+    Hungarian algorithm for an n x m cost matrix, n <= m.
+    Returns {row: column}.
+    """
+    n, m = len(cost), len(cost[0])
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = inf
+            j1 = 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    return {p[j] - 1: j - 1 for j in range(1, m + 1) if p[j]}
+
+
+def _components(scores):
+    # Connected groups of MT/ED names, each assigned on its own
+    parent = {}
+
+    def find(node):
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for i, j in scores:
+        parent[find(("MT", i))] = find(("ED", j))
+
+    groups = defaultdict(lambda: (set(), set()))
+    for i, j in scores:
+        mt_set, ed_set = groups[find(("MT", i))]
+        mt_set.add(i)
+        ed_set.add(j)
+    return [(sorted(mt_set), sorted(ed_set)) for mt_set, ed_set in groups.values()]
+
+
+def pair_filenames(mt_files, ed_files, threshold=FILENAME_MATCH_THRESHOLD):
+    """
+    One-to-one pairing of MT and ED filenames: {mt_file: ed_file}.
+
+    Names are compared in normalized form (normalize_filename) and pairs
+    scoring below threshold are never made. Among the rest, the assignment
+    maximizes the total similarity, so every ED file is used at most once
+    and an MT file only goes unmatched when no ED file is left for it.
+    """
+    mt_files = list(mt_files)
+    ed_files = list(ed_files)
+    if not mt_files or not ed_files:
+        return {}
+
+    mt_names = [normalize_filename(f) for f in mt_files]
+    ed_names = [normalize_filename(f) for f in ed_files]
+    scores = _scored_candidates(mt_names, ed_names, threshold)
+
+    pairs = {}
+    for mt_group, ed_group in _components(scores):
+        if len(mt_group) == 1 and len(ed_group) == 1:
+            pairs[mt_files[mt_group[0]]] = ed_files[ed_group[0]]
+            continue
+
+        # Cost -score for a candidate pair; one free "unmatched" column per
+        # MT file, so weak pairs are dropped rather than forced
+        cost = [
+            [-scores.get((i, j), -1.0) for j in ed_group] + [0.0] * len(mt_group)
+            for i in mt_group
+        ]
+        for row, column in _min_cost_assignment(cost).items():
+            if column < len(ed_group) and (mt_group[row], ed_group[column]) in scores:
+                pairs[mt_files[mt_group[row]]] = ed_files[ed_group[column]]
+
+    return {f: pairs[f] for f in mt_files if f in pairs}
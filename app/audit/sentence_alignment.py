@@ -0,0 +1,150 @@
+import difflib
+import hashlib
+import re
+from collections import Counter
+
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+# ------------------------------------------------------------
+# NORMALIZATION
+# ------------------------------------------------------------
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+
+
+def normalized_text_hash(sentences):
+    """
+    Hash of the sentence-normalized text. Two documents with the same
+    hash produce no differences, whatever their whitespace layout.
+    """
+    return hashlib.sha256("\n".join(sentences).encode("utf-8")).hexdigest()
+
+
+def _calculate_ratio(matches, length):
+    # Same formula difflib uses, so bounds and ratios compare exactly.
+    if length:
+        return 2.0 * matches / length
+    return 1.0
+
+
+# ------------------------------------------------------------
+# ED SENTENCE INDEX
+# ------------------------------------------------------------
+class _EdSentence:
+    __slots__ = ("index", "text", "length", "counts", "matcher")
+
+    def __init__(self, index, text):
+        self.index = index
+        self.text = text
+        self.length = len(text)
+        self.counts = Counter(text)
+        # difflib caches its analysis of the second sequence, so one
+        # matcher per ED sentence is reused for every MT sentence.
+        self.matcher = difflib.SequenceMatcher(None, "", text)
+
+    def real_quick_ratio(self, mt_length):
+        return _calculate_ratio(min(mt_length, self.length), mt_length + self.length)
+
+    def quick_ratio(self, mt_counts, mt_length):
+        matches = sum((mt_counts & self.counts).values())
+        return _calculate_ratio(matches, mt_length + self.length)
+
+    def ratio(self, mt):
+        self.matcher.set_seq1(mt)
+        return self.matcher.ratio()
+
+
+def _best_match(mt, candidates, seed):
+    """
+    Finds the ED sentence with the highest SequenceMatcher ratio, keeping
+    the earliest one on ties, exactly like a full scan would. The
+    positional guess (seed) is scored first so the cheap upper bounds can
+    discard almost every other candidate.
+    """
+    mt_length = len(mt)
+    mt_counts = None
+
+    best = None
+    best_ratio = 0.0
+
+    def beats(bound, candidate):
+        if bound > best_ratio:
+            return True
+        return bound == best_ratio and best is not None and candidate.index < best.index
+
+    ordered = sorted(
+        (c for c in candidates if c is not seed),
+        key=lambda c: (-c.real_quick_ratio(mt_length), c.index),
+    )
+    if seed is not None:
+        ordered.insert(0, seed)
+
+    for candidate in ordered:
+        upper = candidate.real_quick_ratio(mt_length)
+        if not beats(upper, candidate):
+            if candidate is seed:
+                continue
+            break
+
+        if mt_counts is None:
+            mt_counts = Counter(mt)
+        if not beats(candidate.quick_ratio(mt_counts, mt_length), candidate):
+            continue
+
+        ratio = candidate.ratio(mt)
+        if beats(ratio, candidate):
+            best = candidate
+            best_ratio = ratio
+
+    return best, best_ratio
+
+
+# ------------------------------------------------------------
+# ALIGNMENT
+# ------------------------------------------------------------
+def align_sentences(mt_sentences, ed_sentences):
+    """
+    Returns one (mt_sentence, best_ed_sentence, ratio) tuple per MT
+    sentence, in MT order. best_ed_sentence is None when nothing in the
+    ED text shares a single character with the MT sentence.
+
+    1. Identical documents (same normalized hash) short-circuit.
+    2. Identical sentences are paired by hash and become anchors.
+    3. Remaining sentences are scored against the ED sentence that
+       follows the last anchor first, then against the rest in order of
+       their real_quick_ratio / quick_ratio bounds.
+    """
+    if normalized_text_hash(mt_sentences) == normalized_text_hash(ed_sentences):
+        return [(mt, mt, 1.0) for mt in mt_sentences]
+
+    positions = {}
+    for i, ed in enumerate(ed_sentences):
+        positions.setdefault(ed, []).append(i)
+
+    candidates = None
+    memo = {}
+    aligned = []
+    cursor = 0
+
+    for mt in mt_sentences:
+        anchor = positions.get(mt)
+        if anchor:
+            following = [i for i in anchor if i >= cursor]
+            cursor = (following[0] if following else anchor[0]) + 1
+            aligned.append((mt, mt, 1.0))
+            continue
+
+        if mt not in memo:
+            if candidates is None:
+                candidates = [_EdSentence(i, ed) for i, ed in enumerate(ed_sentences)]
+            seed = candidates[cursor] if cursor < len(candidates) else None
+            memo[mt] = _best_match(mt, candidates, seed)
+
+        best, ratio = memo[mt]
+        if best is not None:
+            cursor = best.index + 1
+        aligned.append((mt, best.text if best is not None else None, ratio))
+
+    return aligned
@@ -0,0 +1,224 @@
+import difflib
+import os
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+# "difflib" (reference) or "patience" (patience anchors + Myers). Check a
+# switch with benchmarks/bench_word_diff.py against real feedback first.
+WORD_DIFF_BACKEND = os.getenv("AUDIT_DIFF_BACKEND", "difflib")
+
+
+# ------------------------------------------------------------
+# DIFFLIB (REFERENCE)
+# ------------------------------------------------------------
+def difflib_opcodes(a, b):
+    return difflib.SequenceMatcher(None, a, b).get_opcodes()
+
+
+# ------------------------------------------------------------
+# PATIENCE / MYERS
+# ------------------------------------------------------------
+def _intern(a, b):
+    # Words -> small ints, so every comparison below is an int compare
+    ids = {}
+    a_ids = [ids.setdefault(w, len(ids)) for w in a]
+    b_ids = [ids.setdefault(w, len(ids)) for w in b]
+    return a_ids, b_ids
+
+
+def _myers(a, b, alo, ahi, blo, bhi, matches):
+    """
+    Myers' O((N+M)D) shortest edit script over a[alo:ahi] / b[blo:bhi];
+    appends the matched (i, j) positions in order.
+    """
+    n = ahi - alo
+    m = bhi - blo
+    if not n or not m:
+        return
+
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    trace = []
+
+    for d in range(n + m + 1):
+        trace.append(v[:])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]            # insertion
+            else:
+                x = v[offset + k - 1] + 1        # deletion
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                break
+        else:
+            continue
+        break
+
+    # Walk the trace back from (n, m), collecting diagonal moves
+    found = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[offset + prev_k] if d else 0
+        prev_y = prev_x - prev_k if d else 0
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            found.append((alo + x, blo + y))
+        x, y = prev_x, prev_y
+
+    matches.extend(reversed(found))
+
+
+def _unique_anchors(a, b, alo, ahi, blo, bhi):
+    # Tokens occurring exactly once on each side, kept in the longest
+    # order-preserving run (patience sorting)
+    counts = {}
+    for i in range(alo, ahi):
+        counts[a[i]] = counts.get(a[i], 0) + 1
+    b_index = {}
+    for j in range(blo, bhi):
+        token = b[j]
+        if counts.get(token) == 1:
+            b_index[token] = -1 if token in b_index else j
+
+    pairs = [(i, b_index[a[i]]) for i in range(alo, ahi)
+             if counts[a[i]] == 1 and b_index.get(a[i], -1) >= 0]
+    if not pairs:
+        return []
+
+    piles = []
+    backlinks = []
+    tops = []
+    for index, (i, j) in enumerate(pairs):
+        lo, hi = 0, len(tops)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tops[mid] < j:
+                lo = mid + 1
+            else:
+                hi = mid
+        backlinks.append(piles[lo - 1] if lo else -1)
+        if lo == len(tops):
+            tops.append(j)
+            piles.append(index)
+        else:
+            tops[lo] = j
+            piles[lo] = index
+
+    anchors = []
+    index = piles[-1]
+    while index >= 0:
+        anchors.append(pairs[index])
+        index = backlinks[index]
+    anchors.reverse()
+    return anchors
+
+
+def _patience(a, b, alo, ahi, blo, bhi, matches):
+    # Common prefix
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        matches.append((alo, blo))
+        alo += 1
+        blo += 1
+
+    # Common suffix, added after the middle
+    suffix = []
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        suffix.append((ahi, bhi))
+
+    if alo < ahi and blo < bhi:
+        # A single word on either side needs no anchors
+        anchors = []
+        if ahi - alo > 1 and bhi - blo > 1:
+            anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+
+        if anchors:
+            for i, j in anchors:
+                _patience(a, b, alo, i, blo, j, matches)
+                matches.append((i, j))
+                alo, blo = i + 1, j + 1
+            _patience(a, b, alo, ahi, blo, bhi, matches)
+        else:
+            _myers(a, b, alo, ahi, blo, bhi, matches)
+
+    matches.extend(reversed(suffix))
+
+
+def _opcodes_from_matches(matches, n, m):
+    # Same shape as SequenceMatcher.get_opcodes()
+    blocks = []
+    for i, j in matches:
+        if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+            blocks[-1][2] += 1
+        else:
+            blocks.append([i, j, 1])
+    blocks.append([n, m, 0])
+
+    opcodes = []
+    i = j = 0
+    for ai, bj, size in blocks:
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(("equal", ai, i, bj, j))
+    return opcodes
+
+
+def patience_opcodes(a, b):
+    """
+    Patience diff: words unique to both sides anchor the alignment, and
+    the gaps between anchors are diffed with Myers. Worst case stays near
+    O((N+M)D), and there is no autojunk heuristic to drop frequent words
+    in long dictations.
+    """
+    a_ids, b_ids = _intern(a, b)
+    matches = []
+    _patience(a_ids, b_ids, 0, len(a_ids), 0, len(b_ids), matches)
+    return _opcodes_from_matches(matches, len(a_ids), len(b_ids))
+
+
+# ------------------------------------------------------------
+# BACKENDS
+# ------------------------------------------------------------
+DIFF_BACKENDS = {
+    "difflib": difflib_opcodes,
+    "patience": patience_opcodes,
+}
+
+
+def get_diff_backend(name):
+    try:
+        return DIFF_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown AUDIT_DIFF_BACKEND: {name} (choose from {', '.join(DIFF_BACKENDS)})")
+
+
+# A misspelled setting fails at start-up, not inside every diff
+_default_backend = get_diff_backend(WORD_DIFF_BACKEND)
+
+
+def get_opcodes(a, b, backend=None):
+    """
+    Word-level opcodes (tag, i1, i2, j1, j2) for a -> b, in the format of
+    difflib.SequenceMatcher.get_opcodes(), from the configured backend.
+    """
+    opcodes = get_diff_backend(backend) if backend else _default_backend
+    return opcodes(a, b)
@@ -0,0 +1,26 @@
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive lock on path, shared by every process on the machine
+    (flock on POSIX, msvcrt byte lock on Windows).
+    """
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
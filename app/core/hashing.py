@@ -0,0 +1,15 @@
+import hashlib
+
+
+def document_hash(source):
+    """
+    SHA-256 of a document's bytes; source is a path or the bytes themselves.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, bytes):
+        digest.update(source)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
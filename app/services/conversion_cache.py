@@ -0,0 +1,153 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app.core.hashing import document_hash
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+CONVERT_CACHE_ENABLED = os.getenv("CONVERT_CACHE", "1") != "0"
+CONVERT_CACHE_DIR = os.getenv("CONVERT_CACHE_DIR", os.path.join("cache", "conversions"))
+CONVERT_CACHE_MAX_BYTES = int(os.getenv("CONVERT_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Bump when the LibreOffice export settings change, so old PDFs are ignored
+CONVERSION_VERSION = "1"
+
+EVICT_TO = 0.9              # evict down to 90% of the cap
+
+
+class ConversionCache:
+    """
+    Converted files on local disk, named by the SHA-256 of the input bytes
+    plus the target format, with size-bounded LRU eviction.
+
+    The LRU order lives in memory and is rebuilt from file mtimes at
+    start-up; a hit refreshes the mtime. Several processes can share the
+    folder: a file evicted by another process is just a miss here.
+    """
+
+    def __init__(self, folder=CONVERT_CACHE_DIR, max_bytes=CONVERT_CACHE_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()        # filename -> size, oldest first
+        self.total = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self.started = time.time()
+
+        os.makedirs(folder, exist_ok=True)
+        found = []
+        for entry in os.scandir(folder):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self.entries[name] = size
+            self.total += size
+
+    @staticmethod
+    def key(input_path, target):
+        return f"{document_hash(input_path)}-v{CONVERSION_VERSION}.{target}"
+
+    def _path(self, key):
+        return os.path.join(self.folder, key)
+
+    def get(self, key, output_path):
+        """
+        Puts the cached file at output_path (a hard link when possible,
+        else a copy). Returns False on a miss.
+
+        output_path must belong to this one input (OfficePool gives each
+        input its own folder). A file already there is never replaced:
+        that raises FileExistsError.
+        """
+        path = self._path(key)
+        try:
+            try:
+                os.link(path, output_path)
+            except (FileNotFoundError, FileExistsError):
+                raise
+            except OSError:
+                # No hard links across devices: copy, still without replacing
+                with open(path, "rb") as src, open(output_path, "xb") as dst:
+                    shutil.copyfileobj(src, dst)
+            os.utime(path)
+            size = os.path.getsize(path)
+            hit = True
+        except FileNotFoundError:
+            hit = False
+
+        with self.lock:
+            # Also picks up files stored by other processes
+            self.total -= self.entries.pop(key, 0)
+            if hit:
+                self.entries[key] = size
+                self.total += size
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+        return hit
+
+    def put(self, key, output_path):
+        # Copy under a temporary name first, so readers never see half a file
+        tmp_path = self._path(f".{uuid.uuid4().hex}")
+        shutil.copyfile(output_path, tmp_path)
+        os.replace(tmp_path, self._path(key))
+        size = os.path.getsize(self._path(key))
+
+        with self.lock:
+            self.total += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self.stats["stores"] += 1
+            victims = self._evict()
+
+        for victim in victims:
+            try:
+                os.remove(self._path(victim))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        # Caller holds the lock; returns the keys to delete
+        victims = []
+        if self.total <= self.max_bytes:
+            return victims
+        while self.entries and self.total > self.max_bytes * EVICT_TO:
+            key, size = self.entries.popitem(last=False)
+            self.total -= size
+            victims.append(key)
+        self.stats["evictions"] += len(victims)
+        return victims
+
+    def summary(self):
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+                "entries": len(self.entries),
+                "bytes": self.total,
+                "max_bytes": self.max_bytes,
+                "since": self.started,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_conversion_cache():
+    """
+    The process-wide cache, or None when CONVERT_CACHE=0.
+    """
+    global _cache
+    if not CONVERT_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ConversionCache()
+        return _cache
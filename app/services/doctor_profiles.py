@@ -1,39 +1,81 @@
 print("LOADING doctor_profiles.py FROM:", __file__)
-from typing import List
-from google.cloud import storage
-from docx import Document
-import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import os
+import zipfile
 
-BUCKET_NAME = "clinote-style-samples"
-PREFIX_ROOT = ""
+from lxml import etree
+
+from app.core.logging_config import setup_logging
+from app.services.docx_text import iter_docx_paragraphs
+from app.services.sample_cache import SAMPLE_CACHE, SAMPLE_CACHE_WARM, SampleEntry
+from app.services.sample_manifest import get_sample_manifest
+from app.services.sample_sidecar import SIDECAR_SUFFIX, decode_sidecar, write_sidecar
+from app.services.sample_storage import SampleInfo, get_sample_storage
+
+logger = setup_logging()
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+SAMPLE_DOWNLOAD_WORKERS = int(os.getenv("SAMPLE_DOWNLOAD_WORKERS", "8"))      # parallel downloads
+SAMPLE_DOWNLOAD_TIMEOUT = float(os.getenv("SAMPLE_DOWNLOAD_TIMEOUT", "20"))   # seconds per sample
+
+_download_pool = ThreadPoolExecutor(max_workers=SAMPLE_DOWNLOAD_WORKERS, thread_name_prefix="samples")
 
 
 class DoctorProfileService:
+    """
+    Style samples live at <doctor_id>/<file name> in the sample storage
+    backend (SAMPLE_STORAGE: gcs, local or memory; see sample_storage.py).
+    Doctor listings and sample counts come from the manifest index next
+    to them (see sample_manifest.py), not from listing objects. Each
+    sample's text is extracted once at upload into a sidecar next to it
+    (see sample_sidecar.py).
+    """
 
     @staticmethod
-    def _get_gcs_client() -> storage.Client:
-        return storage.Client()
+    def list_doctors() -> List[str]:
+        """
+        Returns all doctor IDs that have samples, from the manifest
+        """
+        doctor_ids = [d for d in get_sample_manifest().doctor_ids() if d.isdigit()]
+        return sorted(doctor_ids)
 
     @staticmethod
-    def list_doctors() -> List[str]:
+    def sample_count(doctor_id: str) -> int:
         """
-        Returns all doctor IDs by listing folder names under:
-        gs://clinote-style-samples/<doctor_id>/
+        Number of .docx samples under <doctor_id>/, from the manifest
         """
-        client = DoctorProfileService._get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
+        return get_sample_manifest().sample_count(doctor_id)
 
-        iterator = bucket.list_blobs(prefix=PREFIX_ROOT, delimiter="/")
+    @staticmethod
+    def _list_samples_with_sidecars(doctor_id: str) -> List[Tuple[SampleInfo, Optional[SampleInfo]]]:
+        """
+        Returns all .docx samples (with their generations) under:
+        <doctor_id>/
+        each with its text sidecar, or None, from the same listing.
+        """
+        prefix = f"{doctor_id}/"
+        print("DEBUG PREFIX USED:", prefix)
 
-        doctor_ids = []
-        for page in iterator.pages:
-            for prefix in page.prefixes:
-                # Example prefix: "1234/"
-                doctor_id = prefix.rstrip("/")
-                if doctor_id.isdigit():
-                    doctor_ids.append(doctor_id)
+        objects = get_sample_storage().list_samples(doctor_id)
+        sidecars = {o.name: o for o in objects if o.name.endswith(SIDECAR_SUFFIX)}
 
-        return sorted(doctor_ids)
+        samples = []
+        for sample in objects:
+            name = sample.name.lower()
+            if name.endswith(".docx"):
+                samples.append((sample, sidecars.get(sample.name + SIDECAR_SUFFIX)))
+
+        return samples
+
+    @staticmethod
+    def _list_samples(doctor_id: str) -> List[SampleInfo]:
+        """
+        Returns all .docx samples (with their generations) under:
+        <doctor_id>/
+        """
+        return [sample for sample, _ in DoctorProfileService._list_samples_with_sidecars(doctor_id)]
 
     @staticmethod
     def _list_sample_files(doctor_id: str) -> List[str]:
@@ -41,63 +83,127 @@ class DoctorProfileService:
         Returns all .docx object names under:
         <doctor_id>/
         """
-        client = DoctorProfileService._get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
+        return [sample.name for sample in DoctorProfileService._list_samples(doctor_id)]
 
-        prefix = f"{PREFIX_ROOT}{doctor_id}/"
-        print("DEBUG PREFIX USED:", prefix)
-
-        iterator = bucket.list_blobs(prefix=prefix)
-
-        files = []
-        for blob in iterator:
-            name = blob.name.lower()
-            if name.endswith(".docx"):
-                files.append(blob.name)
-
-        return files
+    @staticmethod
+    def _read_sample_text(name: str) -> str:
+        """
+        Reads a .docx sample from storage and extracts text.
+        """
+        data = get_sample_storage().read(name, timeout=SAMPLE_DOWNLOAD_TIMEOUT)
+        return DoctorProfileService._extract_text(data)
 
     @staticmethod
-    def _read_docx_from_gcs(blob) -> str:
+    def _read_sample(sample: SampleInfo, sidecar: Optional[SampleInfo]) -> str:
         """
-        Downloads a .docx file from GCS and extracts text.
+        The sample's text from its sidecar; samples without a current
+        sidecar (uploaded before sidecars, or rewritten since) are parsed.
         """
-        data = blob.download_as_bytes()
-        file_stream = io.BytesIO(data)
-        doc = Document(file_stream)
+        if sidecar is not None:
+            try:
+                data = get_sample_storage().read(sidecar.name, timeout=SAMPLE_DOWNLOAD_TIMEOUT)
+                paragraphs = decode_sidecar(data, sample.generation)
+                if paragraphs is not None:
+                    return "\n".join(paragraphs)
+            except Exception as e:
+                logger.warning(f"Unreadable sidecar {sidecar.name}: {e}")
+        return DoctorProfileService._read_sample_text(sample.name)
 
+    @staticmethod
+    def _extract_paragraphs(data: bytes) -> List[str]:
+        """
+        Non-empty paragraphs of a .docx, stripped.
+        """
         lines = []
-        for para in doc.paragraphs:
-            text = para.text.strip()
+        for para in iter_docx_paragraphs(data):
+            text = para.strip()
             if text:
                 lines.append(text)
 
-        return "\n".join(lines).strip()
+        return lines
 
     @staticmethod
-    def get_style_samples(doctor_id: str) -> List[str]:
+    def _extract_text(data: bytes) -> str:
         """
-        Loads all .docx samples from:
-        gs://clinote-style-samples/<doctor_id>/
+        Non-empty paragraphs of a .docx, one per line.
         """
-        client = DoctorProfileService._get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
+        return "\n".join(DoctorProfileService._extract_paragraphs(data))
 
-        file_names = DoctorProfileService._list_sample_files(doctor_id)
-        if not file_names:
-            return []
+    @staticmethod
+    def _load_style_samples(doctor_id: str) -> SampleEntry:
+        """
+        Lists the doctor's samples and reads their text. Samples whose
+        generation is unchanged since the cached copy are not read again.
+        """
+        version = SAMPLE_CACHE.version(doctor_id) if SAMPLE_CACHE else 0
+        previous = SAMPLE_CACHE.peek(doctor_id) if SAMPLE_CACHE else None
 
-        samples = []
-        for name in file_names:
-            blob = bucket.blob(name)
+        samples = DoctorProfileService._list_samples_with_sidecars(doctor_id)
+        listing = tuple((sample.name, sample.generation) for sample, _ in samples)
+
+        # Unchanged samples are reused; the rest are read in parallel
+        texts = {}
+        downloads = {}
+        for key, (sample, sidecar) in zip(listing, samples):
+            if previous is not None and previous.texts.get(key):
+                texts[key] = previous.texts[key]
+            else:
+                downloads[key] = _download_pool.submit(DoctorProfileService._read_sample, sample, sidecar)
+
+        for key, future in downloads.items():
             try:
-                text = DoctorProfileService._read_docx_from_gcs(blob)
-                if text:
-                    samples.append(text)
+                texts[key] = future.result()
             except Exception:
                 continue
 
-        return samples
+        entry = SampleEntry(listing, texts)
+        if SAMPLE_CACHE is not None:
+            SAMPLE_CACHE.put(doctor_id, entry, version)
+        return entry
+
+    @staticmethod
+    def _cached_samples(doctor_id: str):
+        """
+        The cached entry, revalidated in the background once it is older
+        than SAMPLE_CACHE_TTL; None if the doctor is not cached.
+        """
+        if SAMPLE_CACHE is None:
+            return None
+        entry = SAMPLE_CACHE.get(doctor_id)
+        if entry is not None and entry.stale():
+            SAMPLE_CACHE.refresh_in_background(doctor_id, DoctorProfileService._load_style_samples)
+        return entry
+
+    @staticmethod
+    def get_style_samples(doctor_id: str) -> List[str]:
+        """
+        Loads all .docx samples from:
+        <doctor_id>/
+        """
+        entry = DoctorProfileService._cached_samples(doctor_id)
+        if entry is None:
+            entry = DoctorProfileService._load_style_samples(doctor_id)
+        return entry.samples()
+
+    @staticmethod
+    def warm_sample_cache(doctor_ids: List[str] = None) -> None:
+        """
+        Loads samples for SAMPLE_CACHE_WARM ("all" or comma-separated
+        doctor ids) ahead of the first request.
+        """
+        if SAMPLE_CACHE is None:
+            return
+        if doctor_ids is None:
+            if SAMPLE_CACHE_WARM.strip().lower() == "all":
+                doctor_ids = DoctorProfileService.list_doctors()
+            else:
+                doctor_ids = [d.strip() for d in SAMPLE_CACHE_WARM.split(",") if d.strip()]
+
+        for doctor_id in doctor_ids:
+            try:
+                DoctorProfileService._load_style_samples(doctor_id)
+            except Exception as e:
+                logger.warning(f"Could not warm style samples for {doctor_id}: {e}")
 
     # ------------------------------------------------------------
     # NEW METHOD — REQUIRED FOR UPLOAD ENDPOINT
@@ -106,21 +212,44 @@ class DoctorProfileService:
     def upload_sample(doctor_id: str, file_name: str, file_bytes: bytes) -> str:
         """
         Uploads a .docx file to:
-        gs://clinote-style-samples/<doctor_id>/<file_name>
+        <doctor_id>/<file_name>
         """
-        client = DoctorProfileService._get_gcs_client()
-        bucket = client.bucket(BUCKET_NAME)
-
         object_name = f"{doctor_id}/{file_name}"
-        blob = bucket.blob(object_name)
+        is_sample = object_name.lower().endswith(".docx")
+        # Parsed once here; generation requests only read the sidecar
+        paragraphs = None
+        if is_sample:
+            try:
+                paragraphs = DoctorProfileService._extract_paragraphs(file_bytes)
+            except (zipfile.BadZipFile, KeyError, etree.XMLSyntaxError) as e:
+                raise ValueError(f"{file_name} is not a readable .docx file: {e}")
 
-        # FIXED: Upload as binary, not text
-        blob.upload_from_file(
-            io.BytesIO(file_bytes),
-            content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
+        info = get_sample_storage().write(object_name, file_bytes, content_type=DOCX_CONTENT_TYPE)
 
         print("DEBUG UPLOAD PATH:", object_name)
+
+        if SAMPLE_CACHE is not None:
+            SAMPLE_CACHE.invalidate(doctor_id)
+        if not is_sample:
+            return object_name
+
+        # The sample is stored; from here on nothing fails the upload. A
+        # stale index entry is fixed by `repair`, a missing sidecar by
+        # `backfill` (until then the sample is parsed when loaded)
+        try:
+            get_sample_manifest().record(info, "\n".join(paragraphs))
+        except Exception as e:
+            logger.warning(
+                f"Sample manifest not updated for {object_name}: {e} "
+                f"(run `python -m app.services.sample_manifest repair`)"
+            )
+        try:
+            write_sidecar(object_name, paragraphs, info.generation)
+        except Exception as e:
+            logger.warning(
+                f"No sidecar written for {object_name}: {e} "
+                f"(run `python -m app.services.sample_sidecar backfill`)"
+            )
         return object_name
 
     # ------------------------------------------------------------
@@ -143,4 +272,4 @@ class DoctorProfileService:
         """
         Returns True if <doctor_id>/ contains at least one .docx file.
         """
-        return len(DoctorProfileService._list_sample_files(doctor_id)) > 0
\ No newline at end of file
+        return DoctorProfileService.sample_count(doctor_id) > 0
\ No newline at end of file
@@ -0,0 +1,108 @@
+import io
+import posixpath
+import zipfile
+from typing import Iterator, List
+from xml.etree import ElementTree
+
+from lxml import etree
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+
+
+def _w(tag: str) -> str:
+    return f"{{{W_NS}}}{tag}"
+
+
+W_BODY = _w("body")
+W_P = _w("p")
+W_TBL = _w("tbl")
+W_SDT = _w("sdt")
+W_R = _w("r")
+W_HYPERLINK = _w("hyperlink")
+W_T = _w("t")
+W_BR = _w("br")
+W_TYPE = _w("type")
+
+# Run children python-docx turns into text; w:t and w:br are handled apart
+RUN_TEXT = {
+    _w("cr"): "\n",
+    _w("noBreakHyphen"): "-",
+    _w("ptab"): "\t",
+    _w("tab"): "\t",
+}
+
+
+def _main_part_name(archive: zipfile.ZipFile) -> str:
+    """
+    Resolves the main document part from _rels/.rels, like python-docx does.
+    """
+    try:
+        rels = ElementTree.fromstring(archive.read("_rels/.rels"))
+    except (KeyError, ElementTree.ParseError):
+        return DEFAULT_DOCUMENT_PART
+
+    for rel in rels.iter(f"{{{REL_NS}}}Relationship"):
+        if rel.get("Type") == OFFICE_DOCUMENT:
+            return posixpath.normpath(rel.get("Target", "").lstrip("/"))
+    return DEFAULT_DOCUMENT_PART
+
+
+def _run_text(run) -> str:
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_BR:
+            # Line breaks only; page and column breaks have no text
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag in RUN_TEXT:
+            parts.append(RUN_TEXT[tag])
+    return "".join(parts)
+
+
+def _paragraph_text(paragraph) -> str:
+    # Same scope as python-docx Paragraph.text: direct w:r and w:hyperlink/w:r
+    parts = []
+    for child in paragraph:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(r) for r in child if r.tag == W_R)
+    return "".join(parts)
+
+
+def iter_docx_paragraphs(source) -> Iterator[str]:
+    """
+    Streams the paragraph text of a .docx without building a python-docx
+    Document. source is a path, a binary file object or the file bytes.
+
+    Yields exactly what [p.text for p in Document(source).paragraphs]
+    returns: body-level paragraphs only, so table cells are skipped.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    with zipfile.ZipFile(source) as archive:
+        with archive.open(_main_part_name(archive)) as part:
+            for _, elem in etree.iterparse(part, events=("end",), tag=(W_P, W_TBL, W_SDT)):
+                body = elem.getparent()
+                if body is None or body.tag != W_BODY:
+                    continue
+
+                if elem.tag == W_P:
+                    yield _paragraph_text(elem)
+
+                # Drop finished body content so memory stays flat
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del body[0]
+
+
+def read_docx_paragraphs(source) -> List[str]:
+    return list(iter_docx_paragraphs(source))
@@ -0,0 +1,351 @@
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from app.core.logging_config import setup_logging
+from app.services.conversion_cache import get_conversion_cache
+
+logger = setup_logging()
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+SOFFICE_BINARY = os.getenv("SOFFICE_BINARY", "soffice")
+
+# Where the distribution installs LibreOffice's Python bridge (python3-uno)
+# when it is not on the app interpreter's own path, os.pathsep separated
+OFFICE_UNO_PATH = os.getenv(
+    "OFFICE_UNO_PATH",
+    os.pathsep.join(["/usr/lib/python3/dist-packages", "/usr/lib/libreoffice/program"]),
+)
+OFFICE_POOL_SIZE = int(os.getenv("OFFICE_POOL_SIZE", "2"))                 # soffice instances
+OFFICE_CONVERT_TIMEOUT = int(os.getenv("OFFICE_CONVERT_TIMEOUT", "120"))   # seconds per file
+OFFICE_START_TIMEOUT = int(os.getenv("OFFICE_START_TIMEOUT", "60"))        # seconds per start
+OFFICE_MAX_JOBS = int(os.getenv("OFFICE_MAX_JOBS", "200"))                 # restart after N files
+
+SPREADSHEET_EXTENSIONS = {".xls", ".xlsx", ".ods", ".csv"}
+
+# (document family, target) -> LibreOffice export filter
+EXPORT_FILTERS = {
+    ("writer", "pdf"): "writer_pdf_Export",
+    ("calc", "pdf"): "calc_pdf_Export",
+    ("writer", "docx"): "MS Word 2007 XML",
+}
+
+
+def _import_uno():
+    """
+    The uno module, from the interpreter's path or else OFFICE_UNO_PATH;
+    None if it cannot be loaded. The extra folders are only searched for
+    this import, so other system packages never shadow the app's.
+    """
+    try:
+        import uno
+        return uno
+    except ImportError:
+        pass
+
+    for folder in filter(None, OFFICE_UNO_PATH.split(os.pathsep)):
+        if not os.path.exists(os.path.join(folder, "uno.py")):
+            continue
+        sys.path.append(folder)
+        try:
+            import uno
+            return uno
+        except ImportError:
+            # Built for the system Python, not this interpreter
+            continue
+        finally:
+            sys.path.remove(folder)
+    return None
+
+
+uno = _import_uno()
+
+
+def _export_filter(input_path, target):
+    ext = os.path.splitext(input_path)[1].lower()
+    family = "calc" if ext in SPREADSHEET_EXTENSIONS else "writer"
+    try:
+        return EXPORT_FILTERS[(family, target)]
+    except KeyError:
+        raise RuntimeError(f"Cannot convert {os.path.basename(input_path)} to {target}")
+
+
+def _output_path(input_path, output_dir, target):
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, f"{name}.{target}")
+
+
+def _uno_props(**values):
+    props = []
+    for name, value in values.items():
+        prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+        prop.Name = name
+        prop.Value = value
+        props.append(prop)
+    return tuple(props)
+
+
+# ------------------------------------------------------------
+# WORKER (one long-lived headless soffice)
+# ------------------------------------------------------------
+class OfficeWorker:
+    """
+    A headless LibreOffice with its own user profile, driven over a UNO
+    named pipe. The process is started on first use and restarted after a
+    crash, a timeout, or OFFICE_MAX_JOBS conversions.
+
+    Without the uno module every conversion is a `soffice --convert-to`
+    call instead; the profile is still reused, so only the first call
+    pays for creating it.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.profile_dir = tempfile.mkdtemp(prefix=f"office_profile_{index}_")
+        self.pipe_name = f"clinote_office_{os.getpid()}_{index}_{uuid.uuid4().hex[:8]}"
+        self.process = None
+        self.desktop = None
+        self.jobs = 0
+
+    # ---------------- lifecycle ----------------
+    def _command(self):
+        return [
+            SOFFICE_BINARY,
+            f"-env:UserInstallation={Path(self.profile_dir).as_uri()}",
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--nodefault",
+            "--norestore",
+            "--nolockcheck",
+        ]
+
+    def start(self):
+        self.process = subprocess.Popen(
+            self._command() + [f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local
+        )
+        deadline = time.monotonic() + OFFICE_START_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(
+                    f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+                )
+                break
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("LibreOffice worker did not start")
+                time.sleep(0.25)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", context
+        )
+        self.jobs = 0
+        logger.info(f"LibreOffice worker {self.index} started (pid {self.process.pid})")
+
+    def stop(self):
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+    def kill(self):
+        # Called from the timeout timer: unblocks a hung UNO call
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+
+    def close(self):
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    # ---------------- conversion ----------------
+    def convert(self, input_path, output_dir, target="pdf"):
+        """
+        Converts one file into output_dir; returns the output path.
+        Raises RuntimeError if it fails or takes longer than
+        OFFICE_CONVERT_TIMEOUT.
+        """
+        export_filter = _export_filter(input_path, target)
+        output_path = _output_path(input_path, output_dir, target)
+
+        if uno is None:
+            self._convert_cold(input_path, output_dir, target)
+        else:
+            self._convert_uno(input_path, output_path, export_filter)
+
+        if not os.path.exists(output_path):
+            raise RuntimeError(f"LibreOffice conversion failed for {os.path.basename(input_path)}")
+        return output_path
+
+    def _convert_uno(self, input_path, output_path, export_filter):
+        if not self.alive() or self.jobs >= OFFICE_MAX_JOBS:
+            self.stop()
+            self.start()
+
+        timer = threading.Timer(OFFICE_CONVERT_TIMEOUT, self.kill)
+        timer.start()
+        try:
+            document = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(input_path)), "_blank", 0,
+                _uno_props(Hidden=True, ReadOnly=True),
+            )
+            if document is None:
+                raise RuntimeError("document could not be opened")
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                    _uno_props(FilterName=export_filter),
+                )
+            finally:
+                document.close(True)
+        except Exception as e:
+            timed_out = not timer.is_alive()
+            if not self.alive():
+                # Crashed or killed by the timer; the next job restarts it
+                logger.warning(f"LibreOffice worker {self.index} died, restarting on next job")
+                self.stop()
+            if timed_out:
+                raise RuntimeError(
+                    f"LibreOffice conversion timed out for {os.path.basename(input_path)}"
+                )
+            raise RuntimeError(
+                f"LibreOffice conversion failed for {os.path.basename(input_path)}: {e}"
+            )
+        finally:
+            timer.cancel()
+
+        self.jobs += 1
+
+    def _convert_cold(self, input_path, output_dir, target):
+        try:
+            subprocess.run(
+                self._command() + ["--convert-to", target, "--outdir", output_dir, input_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=OFFICE_CONVERT_TIMEOUT,
+            )
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(
+                f"LibreOffice conversion timed out for {os.path.basename(input_path)}"
+            )
+
+
+# ------------------------------------------------------------
+# POOL
+# ------------------------------------------------------------
+class OfficePool:
+    """
+    OFFICE_POOL_SIZE workers shared by all requests. Each conversion takes
+    an idle worker, so at most that many files convert at once.
+    """
+
+    def __init__(self, size=None):
+        self.size = max(size or OFFICE_POOL_SIZE, 1)
+        if uno is None:
+            logger.warning(
+                f"LibreOffice Python bridge (uno) not importable by {sys.executable}; every "
+                f"conversion starts a cold soffice. Install python3-uno for this Python "
+                f"version or point OFFICE_UNO_PATH at its uno.py."
+            )
+        self.idle = queue.Queue()
+        self.workers = [OfficeWorker(i) for i in range(self.size)]
+        for worker in self.workers:
+            self.idle.put(worker)
+
+    def convert(self, input_path, output_dir, target="pdf"):
+        # Files converted before come from the cache, without a worker.
+        # output_dir is this input's own folder (see iter_converted), so a
+        # hit never lands on another upload's result
+        cache = get_conversion_cache()
+        if cache is not None:
+            key = cache.key(input_path, target)
+            output_path = _output_path(input_path, output_dir, target)
+            if cache.get(key, output_path):
+                return output_path
+
+        worker = self.idle.get()
+        try:
+            output_path = worker.convert(input_path, output_dir, target)
+        finally:
+            self.idle.put(worker)
+
+        if cache is not None:
+            # A full or read-only cache disk must not fail the conversion
+            try:
+                cache.put(key, output_path)
+            except Exception as e:
+                logger.warning(f"Could not cache {os.path.basename(output_path)}: {e}")
+        return output_path
+
+    def iter_converted(self, input_paths, output_dir, target="pdf"):
+        """
+        Converts all files in parallel and yields (input_path, output_path,
+        error) as each one finishes; error is None on success. Closing
+        the generator early cancels the conversions not yet started.
+
+        Each file converts into its own numbered subfolder of output_dir,
+        so inputs with the same stem (a.doc, a.docx) never share an
+        output path.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.size)
+        try:
+            futures = {}
+            for index, input_path in enumerate(input_paths):
+                folder = os.path.join(output_dir, str(index))
+                os.makedirs(folder, exist_ok=True)
+                futures[executor.submit(self.convert, input_path, folder, target)] = input_path
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_office_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OfficePool()
+            atexit.register(_pool.close)
+        return _pool
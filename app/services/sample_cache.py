@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+SAMPLE_CACHE_ENABLED = os.getenv("SAMPLE_CACHE", "1") != "0"
+SAMPLE_CACHE_MAX_BYTES = int(os.getenv("SAMPLE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SAMPLE_CACHE_TTL = int(os.getenv("SAMPLE_CACHE_TTL", "300"))     # seconds before revalidating
+
+# Doctor ids to load at startup ("all" for every doctor)
+SAMPLE_CACHE_WARM = os.getenv("SAMPLE_CACHE_WARM", "")
+
+
+class SampleEntry:
+    """
+    One doctor's samples: the listing it was built from, as
+    ((object name, generation), ...), and the extracted text per object.
+    """
+
+    def __init__(self, listing, texts):
+        self.listing = listing
+        self.texts = texts
+        self.checked = time.monotonic()
+        self.invalidated = False
+        self.size = sum(len(t) for t in texts.values())
+
+    def samples(self):
+        return [self.texts[key] for key in self.listing if self.texts.get(key)]
+
+    def stale(self):
+        return time.monotonic() - self.checked > SAMPLE_CACHE_TTL
+
+
+class SampleCache:
+    """
+    Extracted style-sample text per doctor, in memory, LRU-evicted to
+    SAMPLE_CACHE_MAX_BYTES of text.
+
+    An entry older than SAMPLE_CACHE_TTL is still served, and revalidated
+    in the background (see DoctorProfileService.get_style_samples): the
+    prefix is listed again and only objects whose generation changed are
+    downloaded. upload_sample invalidates the doctor's entry right away.
+    """
+
+    def __init__(self, max_bytes=SAMPLE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()        # doctor_id -> SampleEntry, oldest first
+        self.total = 0
+        self.refreshing = set()
+        self.versions = {}                  # doctor_id -> invalidation count
+
+    def get(self, doctor_id):
+        with self.lock:
+            entry = self.entries.get(doctor_id)
+            if entry is None or entry.invalidated:
+                return None
+            self.entries.move_to_end(doctor_id)
+            return entry
+
+    def peek(self, doctor_id):
+        # No LRU or hit accounting, e.g. to reuse texts while reloading
+        with self.lock:
+            return self.entries.get(doctor_id)
+
+    def version(self, doctor_id):
+        with self.lock:
+            return self.versions.get(doctor_id, 0)
+
+    def put(self, doctor_id, entry, version):
+        """
+        Stores entry unless the doctor was invalidated since version was
+        read (an upload while the samples were loading).
+        """
+        with self.lock:
+            if self.versions.get(doctor_id, 0) != version:
+                return
+            old = self.entries.pop(doctor_id, None)
+            if old is not None:
+                self.total -= old.size
+            self.entries[doctor_id] = entry
+            self.total += entry.size
+
+            while self.total > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total -= evicted.size
+
+    def invalidate(self, doctor_id):
+        # The entry stays for peek(), so unchanged samples are not
+        # downloaded again, but get() no longer serves it
+        with self.lock:
+            self.versions[doctor_id] = self.versions.get(doctor_id, 0) + 1
+            entry = self.entries.get(doctor_id)
+            if entry is not None:
+                entry.invalidated = True
+
+    def refresh_in_background(self, doctor_id, load):
+        """
+        Runs load(doctor_id) on a daemon thread, once per doctor at a time.
+        """
+        with self.lock:
+            if doctor_id in self.refreshing:
+                return
+            self.refreshing.add(doctor_id)
+
+        def run():
+            try:
+                load(doctor_id)
+            except Exception:
+                pass    # keep serving the cached samples; retried on the next request
+            finally:
+                with self.lock:
+                    self.refreshing.discard(doctor_id)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+SAMPLE_CACHE = SampleCache() if SAMPLE_CACHE_ENABLED else None
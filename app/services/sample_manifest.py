@@ -0,0 +1,280 @@
+"""
+Manifest index of the style samples, kept in the sample storage next to
+them, so doctor listings and sample counts do not list objects.
+
+    python -m app.services.sample_manifest repair     # re-sync changed doctors
+    python -m app.services.sample_manifest rebuild    # re-read every sample
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app.core.logging_config import setup_logging
+from app.services.sample_storage import GenerationMismatch, get_sample_storage
+
+logger = setup_logging()
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+# Two-level name like the samples; "_index" is not a doctor id
+MANIFEST_NAME = "_index/manifest.json"
+MANIFEST_TTL = int(os.getenv("SAMPLE_MANIFEST_TTL", "30"))      # seconds between freshness checks
+# Seconds between comparing the doctor folders in storage with the index
+MANIFEST_DOCTOR_REFRESH = int(os.getenv("SAMPLE_MANIFEST_DOCTOR_REFRESH", "600"))
+MANIFEST_VERSION = 1
+MANIFEST_RETRIES = 5
+MAX_MISSES = 10_000     # doctors remembered as having no samples
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _is_sample(name):
+    return name.lower().endswith(".docx")
+
+
+class SampleManifest:
+    """
+    {"version": 1, "updated": <time>, "doctors": {
+        "<doctor_id>": {"<file name>": {"size", "generation", "text_sha256"}}}}
+
+    The parsed index is kept in memory and re-read only when the stored
+    manifest's generation changes (checked at most every
+    SAMPLE_MANIFEST_TTL seconds). Updates are compare-and-swap on that
+    generation, so concurrent uploads from several processes do not lose
+    entries. A missing manifest, or one in another format version, is
+    rebuilt from a listing.
+
+    Samples copied into storage without upload_sample are found too: a
+    doctor missing from the index has their folder listed (and indexed)
+    on lookup, and the doctor folders are compared with the index every
+    SAMPLE_MANIFEST_DOCTOR_REFRESH seconds.
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage or get_sample_storage()
+        self.lock = threading.RLock()
+        self.doctors = None
+        self.generation = 0
+        self.checked = 0.0
+        self.doctors_checked = time.monotonic()
+        self.misses = {}        # doctor_id -> when a listing found no samples
+
+    # ---------------- loading ----------------
+    def _read(self):
+        # (doctors, generation) of the stored manifest; doctors is None when
+        # there is none, or it was written in another format version
+        info = self.storage.stat(MANIFEST_NAME)
+        if info is None:
+            return None, 0
+        data = json.loads(self.storage.read(MANIFEST_NAME))
+        if data.get("version") != MANIFEST_VERSION:
+            return None, info.generation
+        return data.get("doctors", {}), info.generation
+
+    def _load(self):
+        info = self.storage.stat(MANIFEST_NAME)
+        if info is not None and self.doctors is not None and info.generation == self.generation:
+            self.checked = time.monotonic()
+            return
+
+        doctors, generation = self._read()
+        if doctors is None:
+            # First use: index the listing now, text hashes come with `repair`
+            try:
+                self.rebuild(hash_texts=False)
+                return
+            except GenerationMismatch:
+                doctors, generation = self._read()     # another process built it
+                if doctors is None:
+                    raise
+        self.doctors = doctors
+        self.generation = generation
+        self.checked = time.monotonic()
+
+    def _current(self):
+        with self.lock:
+            if self.doctors is None or time.monotonic() - self.checked > MANIFEST_TTL:
+                self._load()
+            return self.doctors
+
+    def _save(self, doctors):
+        # Caller holds the lock; raises GenerationMismatch if it moved
+        data = json.dumps(
+            {"version": MANIFEST_VERSION, "updated": time.time(), "doctors": doctors},
+            separators=(",", ":"), sort_keys=True,
+        ).encode("utf-8")
+        info = self.storage.write(
+            MANIFEST_NAME, data, content_type="application/json",
+            if_generation_match=self.generation,
+        )
+        self.doctors = doctors
+        self.generation = info.generation
+        self.checked = time.monotonic()
+
+    def _update(self, change):
+        """
+        Applies change(doctors) to a fresh copy of the index and saves it,
+        retrying when another writer got there first.
+        """
+        for _ in range(MANIFEST_RETRIES):
+            with self.lock:
+                self._load()
+                doctors = {d: dict(files) for d, files in self.doctors.items()}
+                change(doctors)
+                try:
+                    self._save(doctors)
+                    return
+                except GenerationMismatch:
+                    self.checked = 0.0
+        raise RuntimeError("Sample manifest kept changing; run `python -m app.services.sample_manifest repair`")
+
+    # ---------------- queries ----------------
+    def doctor_ids(self):
+        if time.monotonic() - self.doctors_checked > MANIFEST_DOCTOR_REFRESH:
+            self.doctors_checked = time.monotonic()
+            known = self._current()
+            for doctor_id in self.storage.list_doctors():
+                if doctor_id.isdigit() and not known.get(doctor_id):
+                    self._files(doctor_id)
+        return [d for d, files in self._current().items() if files]
+
+    def samples(self, doctor_id):
+        return dict(self._files(doctor_id))
+
+    def sample_count(self, doctor_id):
+        return len(self._files(doctor_id))
+
+    def _files(self, doctor_id):
+        """
+        The doctor's indexed samples. A doctor not in the index has their
+        folder listed and, if it holds samples, is indexed; folders
+        without samples are listed again after SAMPLE_MANIFEST_TTL.
+        """
+        files = self._current().get(doctor_id)
+        if files:
+            return files
+
+        with self.lock:
+            missed = self.misses.get(doctor_id)
+            if missed is not None and time.monotonic() - missed < MANIFEST_TTL:
+                return {}
+
+        samples = [s for s in self.storage.list_samples(doctor_id) if _is_sample(s.name)]
+        if not samples:
+            with self.lock:
+                if len(self.misses) >= MAX_MISSES:
+                    self.misses.clear()
+                self.misses[doctor_id] = time.monotonic()
+            return {}
+
+        files = {
+            s.name.split("/", 1)[1]: {"size": s.size, "generation": s.generation, "text_sha256": None}
+            for s in samples
+        }
+
+        def change(doctors):
+            indexed = doctors.setdefault(doctor_id, {})
+            for file_name, entry in files.items():
+                if indexed.get(file_name, {}).get("generation") != entry["generation"]:
+                    indexed[file_name] = entry
+
+        try:
+            self._update(change)
+        except Exception as e:
+            logger.warning(f"Could not add doctor {doctor_id} to the sample manifest: {e}")
+        return files
+
+    # ---------------- updates ----------------
+    def record(self, info, text):
+        """
+        Adds or replaces one sample (a SampleInfo from storage.write).
+        """
+        doctor_id, file_name = info.name.split("/", 1)
+        entry = {"size": info.size, "generation": info.generation, "text_sha256": text_hash(text)}
+
+        def change(doctors):
+            doctors.setdefault(doctor_id, {})[file_name] = entry
+
+        self._update(change)
+        with self.lock:
+            self.misses.pop(doctor_id, None)
+
+    def rebuild(self, full=False, hash_texts=True):
+        """
+        Lists every doctor's samples and writes a fresh index. Samples whose
+        generation and text hash are already indexed are kept unless
+        full=True; the others are downloaded to hash their text (skipped
+        with hash_texts=False). Returns (doctors, samples, rehashed).
+        """
+        from app.services.doctor_profiles import DoctorProfileService, _download_pool
+
+        with self.lock:
+            old, self.generation = self._read()
+            old = old or {}
+
+            doctors = {}
+            reads = {}
+            for doctor_id in self.storage.list_doctors():
+                if not doctor_id.isdigit():
+                    continue
+                for sample in self.storage.list_samples(doctor_id):
+                    if not _is_sample(sample.name):
+                        continue
+                    file_name = sample.name.split("/", 1)[1]
+                    entry = {"size": sample.size, "generation": sample.generation, "text_sha256": None}
+                    known = old.get(doctor_id, {}).get(file_name)
+                    if known and known.get("generation") == sample.generation:
+                        entry["text_sha256"] = known.get("text_sha256")
+                    if hash_texts and (full or entry["text_sha256"] is None):
+                        reads[sample.name] = _download_pool.submit(
+                            DoctorProfileService._read_sample_text, sample.name
+                        )
+                    doctors.setdefault(doctor_id, {})[file_name] = entry
+
+            for name, future in reads.items():
+                doctor_id, file_name = name.split("/", 1)
+                try:
+                    doctors[doctor_id][file_name]["text_sha256"] = text_hash(future.result())
+                except Exception:
+                    pass    # unreadable sample; hashed on the next repair
+
+            self._save(doctors)
+            return len(doctors), sum(len(f) for f in doctors.values()), len(reads)
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_sample_manifest():
+    """
+    The manifest of the current sample storage backend.
+    """
+    global _manifest
+    storage = get_sample_storage()
+    with _manifest_lock:
+        if _manifest is None or _manifest.storage is not storage:
+            _manifest = SampleManifest(storage)
+        return _manifest
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=("repair", "rebuild"))
+    args = parser.parse_args()
+
+    doctors, samples, rehashed = get_sample_manifest().rebuild(full=args.command == "rebuild")
+    print(f"{MANIFEST_NAME}: {doctors} doctors, {samples} samples ({rehashed} re-read)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Pre-extracted text of each style sample, stored next to it as
+<doctor_id>/<file name>.text.json.gz, so loading samples is a small read
+instead of downloading and parsing the .docx.
+
+    python -m app.services.sample_sidecar backfill    # samples uploaded before sidecars
+"""
+import argparse
+import gzip
+import json
+from typing import List, Optional
+
+from app.core.logging_config import setup_logging
+from app.services.sample_storage import get_sample_storage
+
+logger = setup_logging()
+
+SIDECAR_SUFFIX = ".text.json.gz"
+SIDECAR_VERSION = 1
+SIDECAR_CONTENT_TYPE = "application/gzip"
+
+
+def sidecar_name(name: str) -> str:
+    return name + SIDECAR_SUFFIX
+
+
+def encode_sidecar(paragraphs: List[str], generation: int) -> bytes:
+    """
+    {"version": 1, "generation": <generation of the .docx>, "paragraphs": [...]}
+    """
+    data = json.dumps(
+        {"version": SIDECAR_VERSION, "generation": generation, "paragraphs": paragraphs},
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return gzip.compress(data.encode("utf-8"), mtime=0)
+
+
+def decode_sidecar(data: bytes, generation: int) -> Optional[List[str]]:
+    """
+    The paragraphs, or None if the sidecar was made from another
+    generation of the .docx (it was rewritten since) or another version.
+    """
+    sidecar = json.loads(gzip.decompress(data))
+    if sidecar.get("version") != SIDECAR_VERSION or sidecar.get("generation") != generation:
+        return None
+    return sidecar["paragraphs"]
+
+
+def write_sidecar(name: str, paragraphs: List[str], generation: int) -> None:
+    get_sample_storage().write(
+        sidecar_name(name), encode_sidecar(paragraphs, generation), content_type=SIDECAR_CONTENT_TYPE
+    )
+
+
+# ------------------------------------------------------------
+# BACKFILL
+# ------------------------------------------------------------
+def backfill(doctor_ids: List[str] = None):
+    """
+    Writes sidecars for samples that have none, or only a stale one.
+    Returns (checked, written, failed).
+    """
+    from app.services.doctor_profiles import DoctorProfileService, _download_pool
+
+    storage = get_sample_storage()
+    if doctor_ids is None:
+        doctor_ids = [d for d in storage.list_doctors() if d.isdigit()]
+
+    def fill(sample):
+        data = storage.read(sample.name)
+        paragraphs = DoctorProfileService._extract_paragraphs(data)
+        write_sidecar(sample.name, paragraphs, sample.generation)
+
+    checked = 0
+    jobs = {}
+    for doctor_id in doctor_ids:
+        for sample, sidecar in DoctorProfileService._list_samples_with_sidecars(doctor_id):
+            checked += 1
+            if sidecar is not None:
+                try:
+                    if decode_sidecar(storage.read(sidecar.name), sample.generation) is not None:
+                        continue
+                except Exception:
+                    pass    # unreadable sidecar; write it again
+            jobs[sample.name] = _download_pool.submit(fill, sample)
+
+    failed = 0
+    for name, future in jobs.items():
+        try:
+            future.result()
+        except Exception as e:
+            failed += 1
+            logger.warning(f"No sidecar for {name}: {e}")
+
+    return checked, len(jobs) - failed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=("backfill",))
+    parser.add_argument("--doctor", action="append", help="only these doctor ids")
+    args = parser.parse_args()
+
+    checked, written, failed = backfill(args.doctor)
+    print(f"{checked} samples checked, {written} sidecars written, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
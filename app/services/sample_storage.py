@@ -0,0 +1,271 @@
+import io
+import os
+import threading
+import uuid
+from typing import List, NamedTuple, Optional
+
+from app.core.file_lock import file_lock
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+SAMPLE_STORAGE = os.getenv("SAMPLE_STORAGE", "gcs")                    # gcs | local | memory
+SAMPLE_BUCKET = os.getenv("SAMPLE_BUCKET", "clinote-style-samples")    # gcs
+SAMPLE_STORAGE_DIR = os.getenv("SAMPLE_STORAGE_DIR", "style_samples")  # local
+SAMPLE_HTTP_POOL_SIZE = int(os.getenv("SAMPLE_HTTP_POOL_SIZE", "16"))  # gcs connections
+
+
+class GenerationMismatch(Exception):
+    """
+    write(..., if_generation_match=g) found the object at another
+    generation (0 means it had to be absent).
+    """
+
+
+class SampleInfo(NamedTuple):
+    name: str           # "<doctor_id>/<file name>"
+    size: int
+    generation: int     # changes whenever the object is rewritten
+
+
+# ------------------------------------------------------------
+# GOOGLE CLOUD STORAGE
+# ------------------------------------------------------------
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def _pooled_client():
+    """
+    The process-wide storage client: auth and HTTP connections are set up
+    once, with enough pooled connections for parallel downloads.
+    A forked worker builds its own.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            import google.auth
+            from google.auth.transport.requests import AuthorizedSession
+            from google.cloud import storage
+            from requests.adapters import HTTPAdapter
+
+            # Our own authorized session, handed to the client, so the
+            # connection pool is configured through public APIs only
+            credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+            session = AuthorizedSession(credentials)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=SAMPLE_HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+
+            client = storage.Client(project=project, credentials=credentials, _http=session)
+            _client, _client_pid = client, os.getpid()
+        return _client
+
+
+class GCSSampleStorage:
+    """
+    gs://<bucket>/<doctor_id>/<file name>
+    """
+
+    def __init__(self, bucket_name: str = SAMPLE_BUCKET):
+        self.bucket_name = bucket_name
+
+    def _bucket(self):
+        return _pooled_client().bucket(self.bucket_name)
+
+    def list_doctors(self) -> List[str]:
+        iterator = self._bucket().list_blobs(prefix="", delimiter="/")
+        doctor_ids = []
+        for page in iterator.pages:
+            for prefix in page.prefixes:
+                # Example prefix: "1234/"
+                doctor_ids.append(prefix.rstrip("/"))
+        return doctor_ids
+
+    def list_samples(self, doctor_id: str) -> List[SampleInfo]:
+        return [
+            SampleInfo(blob.name, blob.size, blob.generation)
+            for blob in self._bucket().list_blobs(prefix=f"{doctor_id}/")
+        ]
+
+    def read(self, name: str, timeout: float = None) -> bytes:
+        blob = self._bucket().blob(name)
+        if timeout is None:
+            return blob.download_as_bytes()
+        return blob.download_as_bytes(timeout=timeout)
+
+    def write(self, name: str, data: bytes, content_type: str = None,
+              if_generation_match: int = None) -> SampleInfo:
+        from google.api_core.exceptions import PreconditionFailed
+
+        blob = self._bucket().blob(name)
+        # Upload as binary, not text
+        try:
+            blob.upload_from_file(
+                io.BytesIO(data), content_type=content_type, if_generation_match=if_generation_match
+            )
+        except PreconditionFailed:
+            raise GenerationMismatch(name)
+        return SampleInfo(name, len(data), blob.generation)
+
+    def stat(self, name: str) -> Optional[SampleInfo]:
+        blob = self._bucket().get_blob(name)
+        if blob is None:
+            return None
+        return SampleInfo(blob.name, blob.size, blob.generation)
+
+
+# ------------------------------------------------------------
+# LOCAL DIRECTORY
+# ------------------------------------------------------------
+class LocalSampleStorage:
+    """
+    Plain files under <root>/<doctor_id>/<file name>, for on-prem sites
+    and tests; the generation is the file's mtime in nanoseconds.
+    Writes go to a temporary name and are renamed into place, so a reader
+    (or an mmap of the file) never sees half a sample.
+    """
+
+    def __init__(self, root: str = SAMPLE_STORAGE_DIR):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, *name.split("/")))
+        if os.path.dirname(os.path.dirname(path)) != self.root:
+            raise ValueError(f"Invalid sample name: {name}")
+        return path
+
+    def list_doctors(self) -> List[str]:
+        return [e.name for e in os.scandir(self.root) if e.is_dir()]
+
+    def list_samples(self, doctor_id: str) -> List[SampleInfo]:
+        folder = os.path.dirname(self._path(f"{doctor_id}/x"))
+        if not os.path.isdir(folder):
+            return []
+        samples = []
+        for e in sorted(os.scandir(folder), key=lambda e: e.name):
+            if e.is_file() and not e.name.startswith("."):
+                st = e.stat()
+                samples.append(SampleInfo(f"{doctor_id}/{e.name}", st.st_size, st.st_mtime_ns))
+        return samples
+
+    def read(self, name: str, timeout: float = None) -> bytes:
+        with open(self._path(name), "rb") as f:
+            return f.read()
+
+    def write(self, name: str, data: bytes, content_type: str = None,
+              if_generation_match: int = None) -> SampleInfo:
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        if if_generation_match is None:
+            os.replace(tmp_path, path)
+            return self.stat(name)
+
+        # Compare and rename under a lock shared by every process
+        with file_lock(os.path.join(self.root, ".lock")):
+            current = self.stat(name)
+            if (current.generation if current else 0) != if_generation_match:
+                os.remove(tmp_path)
+                raise GenerationMismatch(name)
+            os.replace(tmp_path, path)
+            return self.stat(name)
+
+    def stat(self, name: str) -> Optional[SampleInfo]:
+        try:
+            st = os.stat(self._path(name))
+        except FileNotFoundError:
+            return None
+        return SampleInfo(name, st.st_size, st.st_mtime_ns)
+
+
+# ------------------------------------------------------------
+# IN MEMORY
+# ------------------------------------------------------------
+class MemorySampleStorage:
+    """
+    Samples in a dict, for load tests and benchmarks without network.
+    """
+
+    def __init__(self):
+        self.objects = {}       # name -> (bytes, generation)
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def list_doctors(self) -> List[str]:
+        with self.lock:
+            return sorted({name.split("/", 1)[0] for name in self.objects})
+
+    def list_samples(self, doctor_id: str) -> List[SampleInfo]:
+        prefix = f"{doctor_id}/"
+        with self.lock:
+            return [
+                SampleInfo(name, len(data), generation)
+                for name, (data, generation) in sorted(self.objects.items())
+                if name.startswith(prefix)
+            ]
+
+    def read(self, name: str, timeout: float = None) -> bytes:
+        with self.lock:
+            if name not in self.objects:
+                raise FileNotFoundError(name)
+            return self.objects[name][0]
+
+    def write(self, name: str, data: bytes, content_type: str = None,
+              if_generation_match: int = None) -> SampleInfo:
+        with self.lock:
+            if if_generation_match is not None:
+                current = self.objects.get(name, (b"", 0))[1]
+                if current != if_generation_match:
+                    raise GenerationMismatch(name)
+            self.generation += 1
+            self.objects[name] = (bytes(data), self.generation)
+            return SampleInfo(name, len(data), self.generation)
+
+    def stat(self, name: str) -> Optional[SampleInfo]:
+        with self.lock:
+            if name not in self.objects:
+                return None
+            data, generation = self.objects[name]
+            return SampleInfo(name, len(data), generation)
+
+
+# ------------------------------------------------------------
+# SELECTION
+# ------------------------------------------------------------
+SAMPLE_STORAGE_BACKENDS = {
+    "gcs": GCSSampleStorage,
+    "local": LocalSampleStorage,
+    "memory": MemorySampleStorage,
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_sample_storage():
+    """
+    The configured backend (SAMPLE_STORAGE), created on first use.
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            try:
+                backend = SAMPLE_STORAGE_BACKENDS[SAMPLE_STORAGE]
+            except KeyError:
+                raise ValueError(f"Unknown SAMPLE_STORAGE: {SAMPLE_STORAGE}")
+            _storage = backend()
+        return _storage
+
+
+def set_sample_storage(storage) -> None:
+    """
+    Replaces the backend, e.g. with a pre-filled MemorySampleStorage.
+    """
+    global _storage
+    with _storage_lock:
+        _storage = storage
@@ -0,0 +1,37 @@
+import tempfile
+
+# ------------------------------------------------------------
+# CONFIGURATION
+# ------------------------------------------------------------
+UPLOAD_CHUNK_SIZE = 1024 * 1024           # 1 MB reads from the upload
+SPOOL_MAX_SIZE = 64 * 1024 * 1024         # kept in memory below this, disk above
+
+
+# ------------------------------------------------------------
+# UPLOAD SPOOLING
+# ------------------------------------------------------------
+async def spool_upload(upload, max_size=SPOOL_MAX_SIZE):
+    """
+    Copies an UploadFile into a SpooledTemporaryFile chunk by chunk, so the
+    archive is never held in memory as one bytes object.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+async def save_upload(upload, path):
+    """
+    Copies an UploadFile to path chunk by chunk (e.g. into a job workspace).
+    """
+    with open(path, "wb") as f:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
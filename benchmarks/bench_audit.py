@@ -0,0 +1,247 @@
+"""
+Benchmark suite: audit stages and the /audit/run-audit endpoint.
+
+    python benchmarks/bench_audit.py --tracking 50 --docs 5 --sentences 40
+    python benchmarks/bench_audit.py --corpus /path/to/Feedback --json results.json
+    python benchmarks/bench_audit.py --stage compare_sentences --stage process_folder_pair
+
+Without --corpus a synthetic feedback corpus (feedback_corpus.py) is
+generated in a temp folder. Each stage runs in a fresh interpreter, so
+its peak RSS is its own and comparable between runs (a forked child
+would also count the corpus builder's memory); folder-pair workers
+started by the endpoint are reported separately. The audit cache is off
+unless --cache is given, so every run measures the full work.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = (
+    "read_docx_text",
+    "compare_sentences",
+    "process_folder_pair",
+    "write_excel_summary",
+    "run_audit_endpoint",
+)
+
+
+# ------------------------------------------------------------
+# MEASUREMENT
+# ------------------------------------------------------------
+def _max_rss_mb(usage):
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss * scale / (1024 * 1024), 1)
+
+
+def measure(name, feedback_root, work_dir):
+    """
+    Runs stage `name` in a fresh interpreter (this script with
+    --run-stage). The stage returns {"seconds", "items", "unit", "bytes"};
+    peak RSS is added here.
+    """
+    if not hasattr(os, "wait4"):
+        result = globals()[f"stage_{name}"](feedback_root, work_dir)
+        result["peak_rss_mb"] = None
+        return result
+
+    result_path = os.path.join(work_dir, "result.json")
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--run-stage", name, feedback_root, work_dir, result_path]
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    try:
+        with open(result_path) as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        result = {"error": f"stage process died (exit code {process.returncode})"}
+    result["peak_rss_mb"] = _max_rss_mb(usage)
+    return result
+
+
+def run_stage(name, feedback_root, work_dir, result_path):
+    # Child side of measure
+    try:
+        result = globals()[f"stage_{name}"](feedback_root, work_dir)
+        result["worker_rss_mb"] = _max_rss_mb(resource.getrusage(resource.RUSAGE_CHILDREN)) or None
+    except BaseException as e:
+        result = {"error": repr(e)}
+    with open(result_path, "w") as f:
+        json.dump(result, f)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+# ------------------------------------------------------------
+# STAGES (each runs in its own process)
+# ------------------------------------------------------------
+def _docx_paths(feedback_root):
+    paths = []
+    for root, dirs, files in os.walk(feedback_root):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".docx"))
+    return sorted(paths)
+
+
+def _matched_texts(feedback_root):
+    from app.audit.audit_engine import folder_documents, list_folder_pairs, read_docx_text
+    from app.audit.filename_pairing import pair_filenames
+
+    texts = []
+    for tracking_number, mt_folder, ed_folder in list_folder_pairs(feedback_root):
+        mt_documents = folder_documents(mt_folder)
+        ed_documents = folder_documents(ed_folder)
+        for mt_file, ed_file in pair_filenames(mt_documents, ed_documents).items():
+            texts.append((read_docx_text(mt_documents[mt_file]), read_docx_text(ed_documents[ed_file])))
+    return texts
+
+
+def stage_read_docx_text(feedback_root, work_dir):
+    from app.audit.audit_engine import read_docx_text
+
+    paths = _docx_paths(feedback_root)
+    seconds, _ = _timed(lambda: [read_docx_text(p) for p in paths])
+    return {"seconds": seconds, "items": len(paths), "unit": "docs",
+            "bytes": sum(os.path.getsize(p) for p in paths)}
+
+
+def stage_compare_sentences(feedback_root, work_dir):
+    from app.audit.audit_engine import compare_sentences
+    from app.audit.sentence_alignment import split_sentences
+
+    texts = _matched_texts(feedback_root)
+    seconds, _ = _timed(lambda: [compare_sentences(mt, ed) for mt, ed in texts])
+    return {"seconds": seconds, "items": sum(len(split_sentences(mt)) for mt, ed in texts),
+            "unit": "sentences", "bytes": sum(len(mt) + len(ed) for mt, ed in texts)}
+
+
+def stage_process_folder_pair(feedback_root, work_dir):
+    from app.audit.audit_engine import list_folder_pairs, process_folder_pair
+
+    pairs = list_folder_pairs(feedback_root)
+    seconds, _ = _timed(lambda: [process_folder_pair(mt, ed, t) for t, mt, ed in pairs])
+    return {"seconds": seconds, "items": len(pairs), "unit": "folder pairs",
+            "bytes": sum(os.path.getsize(p) for p in _docx_paths(feedback_root))}
+
+
+def stage_write_excel_summary(feedback_root, work_dir):
+    from app.audit.audit_engine import list_folder_pairs, process_folder_pair
+    from app.audit.audit_excel_writer import write_excel_summary
+    from app.audit.audit_pipeline import audit_row
+
+    rows = []
+    unmatched = []
+    for t, mt, ed in list_folder_pairs(feedback_root):
+        diffs, unmatched_files = process_folder_pair(mt, ed, t)
+        rows.extend(audit_row(d) for d in diffs)
+        unmatched.extend(unmatched_files)
+
+    output_dir = os.path.join(work_dir, "output")
+    seconds, path = _timed(lambda: write_excel_summary(rows, unmatched, output_dir))
+    return {"seconds": seconds, "items": len(rows), "unit": "rows", "bytes": os.path.getsize(path)}
+
+
+def stage_run_audit_endpoint(feedback_root, work_dir):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.audit import router as audit_router
+
+    zip_path = shutil.make_archive(
+        os.path.join(work_dir, "feedback"), "zip",
+        root_dir=os.path.dirname(feedback_root), base_dir=os.path.basename(feedback_root),
+    )
+
+    app = FastAPI()
+    app.include_router(audit_router, prefix="/audit")
+    client = TestClient(app)
+
+    os.chdir(work_dir)      # reports go to ./output
+    pairs = sum(1 for d in os.listdir(feedback_root) if d.startswith("0"))
+
+    def post():
+        with open(zip_path, "rb") as f:
+            response = client.post("/audit/run-audit", files={"feedback_zip": ("feedback.zip", f)})
+        response.raise_for_status()
+        return response
+
+    seconds, _ = _timed(post)
+    return {"seconds": seconds, "items": pairs, "unit": "folder pairs",
+            "bytes": os.path.getsize(zip_path)}
+
+
+# ------------------------------------------------------------
+# MAIN
+# ------------------------------------------------------------
+def print_result(name, result):
+    if "error" in result:
+        print(f"{name:<22} ERROR {result['error']}")
+        return
+
+    seconds = result["seconds"]
+    rate = result["items"] / seconds if seconds else float("inf")
+    mb_rate = result["bytes"] / (1024 * 1024) / seconds if seconds else float("inf")
+    workers = f"  workers {result['worker_rss_mb']} MB" if result.get("worker_rss_mb") else ""
+    print(
+        f"{name:<22} {seconds:8.3f}s  {result['items']:>7} {result['unit']:<13}"
+        f"{rate:10.1f}/s {mb_rate:8.2f} MB/s  peak RSS {result['peak_rss_mb']} MB{workers}"
+    )
+
+
+def main():
+    if sys.argv[1:2] == ["--run-stage"]:
+        run_stage(*sys.argv[2:6])
+        return
+
+    from feedback_corpus import add_corpus_arguments, build_feedback_folder, corpus_options
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="existing feedback root with 0xxxx / 1xxxx folders")
+    parser.add_argument("--stage", action="append", choices=STAGES, help="stage(s) to run (default: all)")
+    parser.add_argument("--workers", type=int, default=1, help="AUDIT_WORKERS for the endpoint")
+    parser.add_argument("--cache", action="store_true", help="leave the audit cache on")
+    parser.add_argument("--json", help="write results to this file")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    os.environ["AUDIT_WORKERS"] = str(args.workers)
+    if not args.cache:
+        os.environ["AUDIT_CACHE"] = "0"
+
+    with tempfile.TemporaryDirectory(prefix="bench_audit_") as tmp:
+        if args.corpus:
+            feedback_root = os.path.abspath(args.corpus)
+        else:
+            feedback_root = os.path.join(tmp, "Feedback")
+            count = build_feedback_folder(feedback_root, **corpus_options(args))
+            print(f"generated {count} documents in {args.tracking} folder pairs")
+
+        results = {}
+        for name in args.stage or STAGES:
+            work_dir = os.path.join(tmp, name)
+            os.makedirs(work_dir)
+            results[name] = measure(name, feedback_root, work_dir)
+            print_result(name, results[name])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"corpus": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
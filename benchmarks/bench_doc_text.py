@@ -0,0 +1,149 @@
+"""
+Benchmark and round-trip check: native .doc reader vs LibreOffice conversion.
+
+    python benchmarks/bench_doc_text.py --corpus /path/to/Feedback
+    python benchmarks/bench_doc_text.py --docs 100 --paragraphs 40
+
+Every .doc is read natively (doc_text.read_doc_paragraphs) and also
+converted to .docx with LibreOffice and read with docx_text, the path
+load_documents falls back to. Both must return identical paragraphs.
+Without --corpus, synthetic .docx files (with tables, tabs and line breaks)
+are saved as .doc by LibreOffice first. Needs soffice on PATH (or
+SOFFICE_BINARY).
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from app.audit.doc_converter import SOFFICE_BINARY, convert_docs_to_docx, soffice_available
+from app.audit.doc_text import DocFormatError, read_doc_paragraphs
+from app.services.docx_text import read_docx_paragraphs
+
+WORDS = (
+    "patient presents with history of chronic pain denies fever chills "
+    "examination reveals mild tenderness plan continue current medications "
+    "follow up in two weeks blood pressure stable no acute distress"
+).split()
+
+
+def _sentence(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 40))]
+    return " ".join(words).capitalize() + "."
+
+
+def build_corpus(folder, docs, paragraphs):
+    """
+    Writes synthetic .docx files and has LibreOffice save them as .doc.
+    """
+    rng = random.Random(0)
+    docx_dir = os.path.join(folder, "docx")
+    doc_dir = os.path.join(folder, "doc")
+    os.makedirs(docx_dir)
+    os.makedirs(doc_dir)
+
+    for i in range(docs):
+        doc = Document()
+        for p in range(paragraphs):
+            para = doc.add_paragraph(_sentence(rng))
+            if p % 7 == 3:
+                para.add_run("\tPlan:").add_break()
+                para.add_run(_sentence(rng))
+            if p % 11 == 5:
+                table = doc.add_table(rows=2, cols=2)
+                for cell in table._cells:
+                    cell.text = _sentence(rng)
+            if p % 13 == 0:
+                doc.add_paragraph("")
+        doc.save(os.path.join(docx_dir, f"sample_{i:05d}.docx"))
+
+    subprocess.run(
+        [SOFFICE_BINARY, "--headless", "--norestore", "--convert-to", "doc", "--outdir", doc_dir,
+         *sorted(os.path.join(docx_dir, f) for f in os.listdir(docx_dir))],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+    )
+    return find_corpus(doc_dir)
+
+
+def find_corpus(folder):
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".doc"))
+    return sorted(paths)
+
+
+def native_paragraphs(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return read_doc_paragraphs(data)
+    except DocFormatError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="folder of real .doc files")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    args = parser.parse_args()
+
+    if not soffice_available():
+        sys.exit(f"{SOFFICE_BINARY} not found; the converter path is the reference")
+
+    with tempfile.TemporaryDirectory(prefix="bench_doc_") as tmp:
+        if args.corpus:
+            paths = find_corpus(args.corpus)
+        else:
+            paths = build_corpus(tmp, args.docs, args.paragraphs)
+
+        if not paths:
+            sys.exit("No .doc files found")
+
+        total_mb = sum(os.path.getsize(p) for p in paths) / (1024 * 1024)
+        print(f"corpus: {len(paths)} files, {total_mb:.1f} MB")
+
+        start = time.perf_counter()
+        actual = {p: native_paragraphs(p) for p in paths}
+        native_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        converted = convert_docs_to_docx({p: p for p in paths})
+        expected = {p: read_docx_paragraphs(converted[p]) for p in converted}
+        convert_time = time.perf_counter() - start
+
+        unreadable = [p for p in paths if actual[p] is None]
+        unconverted = [p for p in paths if p not in expected]
+        mismatches = [
+            p for p in paths
+            if actual[p] is not None and p in expected and actual[p] != expected[p]
+        ]
+
+        for name, seconds in (("libreoffice", convert_time), ("doc_text", native_time)):
+            print(f"{name:12s} {seconds:8.3f}s  {len(paths) / seconds:8.1f} docs/s")
+        print(f"speedup: {convert_time / native_time:.1f}x")
+
+        if unconverted:
+            print(f"{len(unconverted)} files did not convert, not compared")
+        if unreadable:
+            print(f"{len(unreadable)} files not read natively (converter fallback), first: {unreadable[0]}")
+        if mismatches:
+            first = mismatches[0]
+            diff = next(
+                (i for i, (a, b) in enumerate(zip(actual[first], expected[first])) if a != b),
+                min(len(actual[first]), len(expected[first])),
+            )
+            print(f"MISMATCH in {len(mismatches)} files, first: {first} at paragraph {diff}")
+            sys.exit(1)
+        print("native output identical to the converter path for all compared files")
+
+
+if __name__ == "__main__":
+    main()
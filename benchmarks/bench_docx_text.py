@@ -0,0 +1,115 @@
+"""
+Benchmark: streaming docx_text extractor vs python-docx.
+
+    python benchmarks/bench_docx_text.py --corpus /path/to/Feedback
+    python benchmarks/bench_docx_text.py --docs 500 --paragraphs 80
+
+With --corpus every .docx under the folder is used (real feedback); without
+it a synthetic corpus of the given size is generated in a temp folder.
+Both extractors must return identical paragraphs for every file.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from app.services.docx_text import read_docx_paragraphs
+
+WORDS = (
+    "patient presents with history of chronic pain denies fever chills "
+    "examination reveals mild tenderness plan continue current medications "
+    "follow up in two weeks blood pressure stable no acute distress"
+).split()
+
+
+def python_docx_paragraphs(path):
+    return [p.text for p in Document(path).paragraphs]
+
+
+def build_corpus(folder, docs, paragraphs):
+    rng = random.Random(0)
+    paths = []
+    for i in range(docs):
+        doc = Document()
+        for _ in range(paragraphs):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 60))]
+            doc.add_paragraph(" ".join(words).capitalize() + ".")
+        path = os.path.join(folder, f"sample_{i:05d}.docx")
+        doc.save(path)
+        paths.append(path)
+    return paths
+
+
+def find_corpus(folder):
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".docx"))
+    return sorted(paths)
+
+
+def time_extractor(extract, paths):
+    start = time.perf_counter()
+    results = [extract(p) for p in paths]
+    return time.perf_counter() - start, results
+
+
+def peak_memory(extract, path):
+    tracemalloc.start()
+    extract(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="folder of real .docx files")
+    parser.add_argument("--docs", type=int, default=300)
+    parser.add_argument("--paragraphs", type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_docx_") as tmp:
+        if args.corpus:
+            paths = find_corpus(args.corpus)
+        else:
+            paths = build_corpus(tmp, args.docs, args.paragraphs)
+
+        if not paths:
+            sys.exit("No .docx files found")
+
+        total_mb = sum(os.path.getsize(p) for p in paths) / (1024 * 1024)
+        largest = max(paths, key=os.path.getsize)
+
+        print(f"corpus: {len(paths)} files, {total_mb:.1f} MB")
+
+        baseline_time, expected = time_extractor(python_docx_paragraphs, paths)
+        fast_time, actual = time_extractor(read_docx_paragraphs, paths)
+
+        mismatches = [p for p, a, b in zip(paths, expected, actual) if a != b]
+
+        for name, seconds, extract in (
+            ("python-docx", baseline_time, python_docx_paragraphs),
+            ("docx_text", fast_time, read_docx_paragraphs),
+        ):
+            peak_kb = peak_memory(extract, largest) / 1024
+            print(
+                f"{name:12s} {seconds:8.3f}s  {len(paths) / seconds:8.1f} docs/s  "
+                f"{total_mb / seconds:7.2f} MB/s  peak {peak_kb:8.0f} KB (largest file)"
+            )
+
+        print(f"speedup: {baseline_time / fast_time:.1f}x")
+        if mismatches:
+            print(f"MISMATCH in {len(mismatches)} files, first: {mismatches[0]}")
+            sys.exit(1)
+        print("output identical for all files")
+
+
+if __name__ == "__main__":
+    main()
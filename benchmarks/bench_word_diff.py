@@ -0,0 +1,111 @@
+"""
+Benchmark and regression check: word diff backends for extract_minimal_change.
+
+    python benchmarks/bench_word_diff.py --corpus /path/to/Feedback
+    python benchmarks/bench_word_diff.py --pairs 20000 --backend patience
+
+With --corpus the MT/ED sentence pairs of every folder pair under the
+feedback root are used (real dictations); without it a synthetic set of
+edited sentences is generated. Every backend is compared with the
+difflib reference: the script exits 1 if any (typed, dictated) snippet
+differs, so it can gate a switch of AUDIT_DIFF_BACKEND.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.audit.audit_engine import (
+    extract_minimal_change, folder_documents, list_folder_pairs, load_documents,
+)
+from app.audit.filename_pairing import pair_filenames
+from app.audit.sentence_alignment import align_sentences, split_sentences
+from app.audit.word_diff import DIFF_BACKENDS
+
+WORDS = (
+    "patient presents with history of chronic pain denies fever chills "
+    "examination reveals mild tenderness plan continue current medications "
+    "follow up in two weeks blood pressure stable no acute distress"
+).split()
+
+
+def synthetic_pairs(count):
+    rng = random.Random(0)
+    pairs = []
+    for _ in range(count):
+        mt = [rng.choice(WORDS) for _ in range(rng.randint(6, 60))]
+        ed = list(mt)
+        for _ in range(rng.randint(1, 4)):
+            op = rng.random()
+            if op < 0.5 and ed:
+                ed[rng.randrange(len(ed))] = rng.choice(WORDS)
+            elif op < 0.75:
+                ed.insert(rng.randint(0, len(ed)), rng.choice(WORDS))
+            elif ed:
+                del ed[rng.randrange(len(ed))]
+        pairs.append((" ".join(mt), " ".join(ed)))
+    return pairs
+
+
+def corpus_pairs(feedback_root):
+    # The same sentence pairs the audit diffs, from every matched document
+    pairs = []
+    for tracking_number, mt_folder, ed_folder in list_folder_pairs(feedback_root):
+        mt_documents = folder_documents(mt_folder)
+        ed_documents = folder_documents(ed_folder)
+        for mt_file, ed_file in pair_filenames(mt_documents, ed_documents).items():
+            texts = load_documents({
+                "MT": (mt_file, mt_documents[mt_file]),
+                "ED": (ed_file, ed_documents[ed_file]),
+            })
+            if texts["MT"] is None or texts["ED"] is None:
+                continue
+            for mt, ed, ratio in align_sentences(split_sentences(texts["MT"]), split_sentences(texts["ED"])):
+                if ratio < 1.0:
+                    pairs.append((mt, ed or ""))
+    return pairs
+
+
+def run_backend(backend, pairs, context_words):
+    start = time.perf_counter()
+    results = [extract_minimal_change(mt, ed, context_words, backend) for mt, ed in pairs]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="feedback root with 0xxxx / 1xxxx folders")
+    parser.add_argument("--pairs", type=int, default=20000)
+    parser.add_argument("--context-words", type=int, default=5)
+    parser.add_argument("--backend", action="append", help="backend(s) to check (default: all)")
+    parser.add_argument("--show", type=int, default=5, help="mismatches to print per backend")
+    args = parser.parse_args()
+
+    pairs = corpus_pairs(args.corpus) if args.corpus else synthetic_pairs(args.pairs)
+    words = sum(len(mt.split()) + len(ed.split()) for mt, ed in pairs)
+    print(f"{len(pairs)} sentence pairs, {words} words")
+
+    ref_time, reference = run_backend("difflib", pairs, args.context_words)
+    print(f"{'difflib':<10} {ref_time:8.3f}s  (reference)")
+
+    failed = False
+    for backend in args.backend or [b for b in DIFF_BACKENDS if b != "difflib"]:
+        elapsed, results = run_backend(backend, pairs, args.context_words)
+        mismatches = [i for i, (r, ref) in enumerate(zip(results, reference)) if r != ref]
+        print(
+            f"{backend:<10} {elapsed:8.3f}s  x{ref_time / elapsed:5.2f}  "
+            f"identical {len(pairs) - len(mismatches)}/{len(pairs)}"
+        )
+        for i in mismatches[:args.show]:
+            print(f"  MT: {pairs[i][0]}\n  ED: {pairs[i][1]}")
+            print(f"    difflib : {reference[i]}\n    {backend:<8}: {results[i]}")
+        failed = failed or bool(mismatches)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
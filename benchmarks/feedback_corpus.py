@@ -0,0 +1,186 @@
+"""
+Synthetic feedback corpus: 0xxxx (ED) / 1xxxx (MT) folder pairs of .docx
+files shaped like real feedback, without any PHI.
+
+    python benchmarks/feedback_corpus.py out/Feedback --tracking 50 --docs 5
+    python benchmarks/feedback_corpus.py out/feedback.zip --tracking 200 --edit-rate 0.3
+
+Each tracking number gets an ED folder "0<site>-<n>-<timestamp>" and its
+MT twin "1<site>-<n>-<timestamp>". MT documents are the transcription;
+the ED copy of each is the edited version (a share of sentences with
+word substitutions, insertions and deletions) signed with typist
+initials. The same arguments and seed always give the same corpus.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import zipfile
+
+from docx import Document
+
+LAST_NAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez "
+    "Hernandez Lopez Gonzalez Wilson Anderson Thomas Taylor Moore Jackson Martin "
+    "Lee Perez Thompson White Harris Sanchez Clark Ramirez Lewis Robinson"
+).split()
+FIRST_NAMES = "James Mary Robert Patricia John Jennifer Michael Linda David Susan".split()
+TYPISTS = ("AB", "JK", "PM", "RS", "TL")
+
+SUBJECTS = (
+    "The patient", "She", "He", "The patient's mother", "Examination",
+    "Chest x-ray", "Blood pressure", "The abdomen", "Neurologic exam", "Her pain",
+)
+PREDICATES = (
+    "presents with a {n}-day history of intermittent chest pain",
+    "denies fever, chills, nausea or vomiting",
+    "reveals mild tenderness in the right lower quadrant",
+    "was stable at {n}0/{n}5 on current medications",
+    "is soft and nontender without rebound or guarding",
+    "reports improvement since the last visit {n} weeks ago",
+    "shows no acute cardiopulmonary process",
+    "was started on lisinopril {n}0 mg daily",
+    "will follow up in the clinic in {n} weeks",
+    "is alert and oriented times three with no focal deficits",
+)
+SUBSTITUTIONS = (
+    ("mild", "moderate"), ("right", "left"), ("denies", "reports"), ("weeks", "days"),
+    ("stable", "elevated"), ("soft", "firm"), ("daily", "twice daily"),
+    ("no", "a"), ("chest", "back"), ("improvement", "worsening"),
+)
+FILLERS = ("also", "again", "currently", "reportedly", "significant", "otherwise")
+
+
+def make_sentence(rng):
+    predicate = rng.choice(PREDICATES).format(n=rng.randint(2, 9))
+    return f"{rng.choice(SUBJECTS)} {predicate}."
+
+
+def edit_sentence(rng, sentence):
+    """
+    One to three word-level edits, as an editor would make them.
+    """
+    words = sentence[:-1].split()
+    for _ in range(rng.randint(1, 3)):
+        op = rng.random()
+        if op < 0.5:
+            for i, word in enumerate(words):
+                pairs = [p for p in SUBSTITUTIONS if p[0] == word]
+                if pairs and rng.random() < 0.5:
+                    words[i] = pairs[0][1]
+                    break
+            else:
+                words[rng.randrange(len(words))] = rng.choice(FILLERS)
+        elif op < 0.8:
+            words.insert(rng.randint(1, len(words)), rng.choice(FILLERS))
+        elif len(words) > 3:
+            del words[rng.randrange(1, len(words))]
+    return " ".join(words) + "."
+
+
+def make_document_pair(rng, sentences, edit_rate):
+    mt = [make_sentence(rng) for _ in range(sentences)]
+    ed = [edit_sentence(rng, s) if rng.random() < edit_rate else s for s in mt]
+    return mt, ed
+
+
+def docx_bytes(paragraphs):
+    doc = Document()
+    for paragraph in paragraphs:
+        doc.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def iter_feedback_files(tracking_numbers=20, docs_per_folder=5, sentences=30,
+                        edit_rate=0.2, paragraph_sentences=5, seed=0):
+    """
+    Yields (relative path, .docx bytes) for every document of the corpus.
+    """
+    rng = random.Random(seed)
+
+    for n in range(tracking_numbers):
+        site = f"SITE{n % 7}"
+        folder = f"{site}-{n:05d}-2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}{n:04d}"
+        typist = rng.choice(TYPISTS)
+
+        used = set()
+        for _ in range(docs_per_folder):
+            while True:
+                last = rng.choice(LAST_NAMES)
+                name = f"{last}, {rng.choice(FIRST_NAMES)}-{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}24"
+                if name not in used:
+                    used.add(name)
+                    break
+
+            mt, ed = make_document_pair(rng, sentences, edit_rate)
+            mt_paragraphs = [" ".join(mt[i:i + paragraph_sentences]) for i in range(0, len(mt), paragraph_sentences)]
+            ed_paragraphs = [" ".join(ed[i:i + paragraph_sentences]) for i in range(0, len(ed), paragraph_sentences)]
+            ed_paragraphs.append(f"Dictated by: Dr. {last}/{typist}")
+
+            yield f"1{folder}/{name}.docx", docx_bytes(mt_paragraphs)
+            yield f"0{folder}/{name}.docx", docx_bytes(ed_paragraphs)
+
+
+def build_feedback_folder(root, **options):
+    """
+    Writes the corpus under root (the feedback root); returns the file count.
+    """
+    count = 0
+    for relative_path, data in iter_feedback_files(**options):
+        path = os.path.join(root, *relative_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        count += 1
+    return count
+
+
+def build_feedback_zip(path, root_name="Feedback", **options):
+    """
+    Writes the corpus as a ZIP with the folders under root_name/, the way
+    feedback is uploaded to /audit/run-audit; returns the file count.
+    """
+    count = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for relative_path, data in iter_feedback_files(**options):
+            zf.writestr(f"{root_name}/{relative_path}", data)
+            count += 1
+    return count
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--tracking", type=int, default=20, help="tracking numbers (folder pairs)")
+    parser.add_argument("--docs", type=int, default=5, help="documents per folder")
+    parser.add_argument("--sentences", type=int, default=30, help="sentences per document")
+    parser.add_argument("--edit-rate", type=float, default=0.2, help="share of sentences edited")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def corpus_options(args):
+    return {
+        "tracking_numbers": args.tracking,
+        "docs_per_folder": args.docs,
+        "sentences": args.sentences,
+        "edit_rate": args.edit_rate,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", help="feedback root folder, or a .zip path")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    if args.output.lower().endswith(".zip"):
+        count = build_feedback_zip(args.output, **corpus_options(args))
+    else:
+        count = build_feedback_folder(args.output, **corpus_options(args))
+    print(f"{count} documents written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 #!/usr/bin/env bash
 set -o errexit
 
-# Install LibreOffice at runtime (Render allows apt-get here)
+# Install LibreOffice at runtime (Render allows apt-get here).
+# python3-uno lets the PDF conversion pool (app/services/office_pool.py)
+# keep soffice running; it must match this Python's version, otherwise
+# every conversion starts a cold soffice (logged at start-up).
 apt-get update || true
-apt-get install -y libreoffice || true
+apt-get install -y libreoffice python3-uno || true
 
 # Start the FastAPI app
 uvicorn typing_engine_api:app --host 0.0.0.0 --port 10000
\ No newline at end of file
@@ -1,3 +1,5 @@
+import threading
+
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -7,14 +9,17 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.health import router as health_router
 from app.api.transcribe import router as transcribe_router
 from app.api.audit import router as audit_router
+from app.audit.audit_events import router as audit_events_router
 from app.api.routes_style_engine import router as style_engine_router
 from app.api.routes_doctors import router as doctors_router
+from app.audit.audit_jobs import recover_jobs
 
 # NEW ROUTERS
 from app.api.convert_doc_to_docx import router as doc_to_docx_router
 from app.api.convert_to_pdf import router as convert_to_pdf_router
 
 from app.services.doctor_profiles import DoctorProfileService
+from app.services.sample_cache import SAMPLE_CACHE_WARM
 
 # ------------------------------------------------------------
 # CREATE APP
@@ -42,6 +47,7 @@ app.add_middleware(
 app.include_router(health_router)
 app.include_router(transcribe_router)
 app.include_router(audit_router, prefix="/audit")
+app.include_router(audit_events_router, prefix="/audit")
 app.include_router(style_engine_router)
 app.include_router(doctors_router)
 
@@ -49,6 +55,22 @@ app.include_router(doctors_router)
 app.include_router(doc_to_docx_router, prefix="/doc-to-docx", tags=["DocToDocx"])
 app.include_router(convert_to_pdf_router, prefix="/convert", tags=["ConvertToPdf"])
 
+# ------------------------------------------------------------
+# STARTUP
+# ------------------------------------------------------------
+@app.on_event("startup")
+def recover_audit_jobs():
+    # Jobs interrupted by the last shutdown are failed, not left running
+    recover_jobs()
+
+
+@app.on_event("startup")
+def warm_style_samples():
+    # Load the busiest doctors' samples in the background, off startup
+    if SAMPLE_CACHE_WARM:
+        threading.Thread(target=DoctorProfileService.warm_sample_cache, daemon=True).start()
+
+
 # ------------------------------------------------------------
 # DIRECT SAMPLE UPLOAD ENDPOINT
 # ------------------------------------------------------------
@@ -69,5 +91,7 @@ async def upload_sample(doctor_id: str, file: UploadFile = File(...)):
 
         return {"uploaded": object_name}
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file